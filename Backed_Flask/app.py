@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from routes.summarize import summary_bp
 from routes.quiz import quiz_bp
 from routes.emotion import emotion_bp
@@ -9,12 +9,20 @@ from routes.transcribe import transcribe_bp
 from routes.storytelling import storytelling_bp
 from routes.analytics import analytics_bp
 from routes.memory import memory_bp
+from services.cache_service import get_cache_stats
+from services.singleflight import get_singleflight_stats
+from services.rate_limiter import get_rate_limiter_stats
+from services.resilience import get_resilience_stats
+from services.ocr_service import get_ocr_stats
+from services.uploads import UploadRequest, MAX_UPLOAD_BYTES
 from flask_cors import CORS
 
 app = Flask(__name__)
+# File uploads are spooled and hashed as they stream in instead of being read into memory
+app.request_class = UploadRequest
 CORS(app, origins=["*"], supports_credentials=True) 
-app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10 MB
-# Set maximum content length for file uploads
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES  # MAX_UPLOAD_MB, 50 MB by default
+# Set maximum content length for file uploads; upload routes may set a lower limit per request
 
 # Register blueprints
 app.register_blueprint(summary_bp)
@@ -37,9 +45,11 @@ def welcome():
             '/api/summarize',
             '/api/summarize-pdf', 
             '/api/ocr',
+            '/api/ocr/batch',
             '/api/generate-quiz',
             '/api/ask-question',
             '/api/summarize-youtube',
+            '/api/summarize-youtube-playlist',
             '/api/detect-emotion',
             '/api/text-to-speech',
             '/api/voices',
@@ -52,6 +62,7 @@ def welcome():
             '/api/transcribe',
             '/api/memory/recap',
             '/api/memory/study-plan',
+            '/api/metrics',
         ]
     })
 
@@ -63,9 +74,20 @@ def health_check():
         'version': '1.0.0'
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'cache': get_cache_stats(),
+        'inflight': get_singleflight_stats(),
+        'rate_limits': get_rate_limiter_stats(),
+        'upstreams': get_resilience_stats(),
+        'ocr': get_ocr_stats()
+    })
+
 @app.errorhandler(413)
 def request_entity_too_large(error):
-    return jsonify({'error': 'PDF file is too large. Maximum allowed size is 10MB.'}), 413
+    limit_mb = (request.max_content_length or MAX_UPLOAD_BYTES) // (1024 * 1024)
+    return jsonify({'error': f'File is too large. Maximum allowed size is {limit_mb}MB.'}), 413
 
 if __name__ == '__main__':
     print("🚀 Starting Mentora Flask Backend...")
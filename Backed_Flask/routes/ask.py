@@ -1,5 +1,6 @@
 from flask import Flask, Blueprint, request, jsonify
-from services.gemini_service import ask_qustion
+from services.gemini_service import ask_qustion, stream_answer
+from services.streaming import wants_stream, stream_tokens, sse_response
 
 ask_bp = Blueprint('ask', __name__)
 
@@ -12,6 +13,12 @@ def ask():
         if not question:
             return jsonify({'error': 'No question provided'}), 400
         
+        if wants_stream(request, data):
+            return sse_response(stream_tokens(
+                stream_answer(question),
+                lambda answer_text: {'Your answers': answer_text}
+            ))
+        
         answer = ask_qustion(question)
         return jsonify(answer)
     
@@ -1,8 +1,13 @@
+import os
+import time
+from collections import Counter
 from flask import Flask, Blueprint, request, jsonify
-from services.emotion_service import detect_emotion_from_voice_text, get_break_suggestions
+from services.emotion_service import detect_emotion_from_voice_text, get_break_suggestions, analyze_text_emotions
 
 emotion_bp = Blueprint('emotion', __name__)
 
+EMOTION_BATCH_MAX_TEXTS = int(os.getenv('EMOTION_BATCH_MAX_TEXTS', '50000'))
+
 @emotion_bp.route('/api/detect-emotion', methods=['POST'])
 def detect_emotion():
     """
@@ -13,13 +18,13 @@ def detect_emotion():
         
         # Get the text from voice input
         text = data.get('text', '')
-        duration_preference = data.get('duration', 'medium')  # short, medium, long
+        duration_preference = data.get('duration')  # short, medium, long
         
         if not text:
             return jsonify({'error': 'No text provided for emotion analysis'}), 400
         
         # Analyze emotion and get suggestions
-        result = detect_emotion_from_voice_text(text)
+        result = detect_emotion_from_voice_text(text, duration_preference)
         
         return jsonify({
             'success': True,
@@ -42,13 +47,44 @@ def detect_emotion():
             }
         }), 500
 
+@emotion_bp.route('/api/detect-emotion/batch', methods=['POST'])
+def detect_emotion_batch():
+    """
+    Detect the emotion of many texts at once (journal history, analytics).
+    Returns one {'emotion', 'confidence'} per text, in input order, without suggestions.
+    """
+    try:
+        data = request.get_json()
+        texts = data.get('texts') if data else None
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'Provide a non-empty list of texts in "texts"'}), 400
+        if len(texts) > EMOTION_BATCH_MAX_TEXTS:
+            return jsonify({'error': f'Too many texts. Maximum is {EMOTION_BATCH_MAX_TEXTS} per request.'}), 400
+        if not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'Every item in "texts" must be a string'}), 400
+        
+        started = time.perf_counter()
+        results = analyze_text_emotions(texts)
+        print(f"🎭 Scored {len(texts)} text(s) in {time.perf_counter() - started:.3f}s")
+        
+        return jsonify({
+            'success': True,
+            'results': [{'emotion': emotion, 'confidence': confidence} for emotion, confidence in results],
+            'counts': dict(Counter(emotion for emotion, _ in results))
+        })
+    
+    except Exception as e:
+        print(f"Emotion detection error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @emotion_bp.route('/api/break-suggestions/<emotion>', methods=['GET'])
 def get_suggestions_for_emotion(emotion):
     """
     Get break suggestions for a specific emotion
     """
     try:
-        duration = request.args.get('duration', 'medium')
+        duration = request.args.get('duration')
         suggestions = get_break_suggestions(emotion, duration)
         
         return jsonify({
@@ -1,5 +1,5 @@
 from flask import Flask, Blueprint, request, jsonify
-from services.gemini_service import genrate_Quiz
+from services.question_bank import get_quiz
 
 quiz_bp = Blueprint("quiz", __name__)
 
@@ -9,6 +9,7 @@ def genrate_quiz():
         data = request.get_json()
         text = data.get("text", '')
         difficulty = data.get("difficulty", "Beginner")
+        user_id = data.get("userId")
 
         if not text:
             return jsonify({'error': 'No text provided'}), 400
@@ -19,13 +20,14 @@ def genrate_quiz():
         print(f"   Text preview: {text[:100]}...")
         print(f"   Difficulty level: {difficulty}")
 
-        result = genrate_Quiz(text, difficulty)
+        # Served from the question bank when this text has been quizzed before
+        result = get_quiz(text, difficulty, user_id)
 
         if 'error' in result:
             print(f"❌ Quiz generation failed: {result['error']}")
             return jsonify(result), 500
         
-        print(f"✅ Quiz generated successfully")
+        print(f"✅ Quiz ready ({result.get('source')}, {len(result.get('questions', []))} questions)")
         print(f"   Quiz preview: {result.get('Your Quiz', '')[:200]}...")
         
         return jsonify(result)
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from services.gemini_service import generate_story_content
+from services.gemini_service import generate_story_content, start_story_title, stream_story_content
+from services.streaming import wants_stream, stream_tokens, sse_response
 from services.tavus_service import generate_avatar_video
 from services.elevenlabs_service import text_to_speech
 import tempfile
@@ -29,6 +30,23 @@ def generate_story():
         if not topic or not character:
             return jsonify({'error': 'Topic and character are required'}), 400
         
+        if wants_stream(request, data):
+            # The title is generated while the story streams
+            title_future = start_story_title(topic, character, emotion)
+            
+            def build_story_result(story_content):
+                return {
+                    'success': True,
+                    'title': title_future.result(),
+                    'content': story_content,
+                    'duration': duration
+                }
+            
+            return sse_response(stream_tokens(
+                stream_story_content(topic, character, emotion, duration),
+                build_story_result
+            ))
+        
         # Generate story content using Gemini
         story_result = generate_story_content(topic, character, emotion, duration)
         
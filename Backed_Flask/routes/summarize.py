@@ -1,14 +1,19 @@
 from flask import Flask, Blueprint, request, jsonify
-from services.gemini_service import genrate_sumary
-import PyPDF2
-import io
-import tempfile
+from services.gemini_service import genrate_sumary, stream_sumary
+from services.streaming import wants_stream, stream_tokens, sse_response, format_sse
+from services.summarization_service import summarize_long_text
+from services.pdf_service import extract_pdf_pages
+from services.uploads import receive_upload, PDF_MAX_UPLOAD_BYTES, IMAGE_MAX_UPLOAD_BYTES, MAX_UPLOAD_BYTES
+from services.extraction_cache import get_extraction, store_extraction
+from services.ocr_service import OCR_STATUS, ocr_image, submit_ocr, split_pages
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
-import platform
 import time
 
 summary_bp = Blueprint('summary', __name__)
 
+OCR_BATCH_MAX_PAGES = int(os.getenv('OCR_BATCH_MAX_PAGES', '100'))
+
 @summary_bp.route("/api/summarize", methods=['POST'])
 def summary():
     try:
@@ -18,6 +23,12 @@ def summary():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
+        if wants_stream(request, data):
+            return sse_response(stream_tokens(
+                stream_sumary(text),
+                lambda summary_text: {'Summary': summary_text}
+            ))
+        
         result = genrate_sumary(text)
         return jsonify(result)
     
@@ -26,129 +37,105 @@ def summary():
 
 @summary_bp.route('/api/summarize-pdf', methods=['POST'])
 def summarize_pdf():
+    # Enforced while the body streams in, so oversized files are rejected before they are spooled
+    request.max_content_length = PDF_MAX_UPLOAD_BYTES
     try:
         if 'pdf' not in request.files:
             return jsonify({'error': 'No PDF file provided'}), 400
         
-        pdf_file = request.files['pdf']
-        pdf_file.seek(0, os.SEEK_END)
-        size = pdf_file.tell()
-        pdf_file.seek(0)
-        if size > 10 * 1024 * 1024:
-            return jsonify({'error': 'PDF file is too large. Maximum allowed size is 10MB.'}), 413
-        
-        # Read PDF content
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file.read()))
-        text = ""
+        # Hashed while it was received; worker processes open it by path
+        upload = receive_upload(request.files['pdf'])
+        digest = upload.sha256
         
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
+        # Re-uploads of the same file skip parsing entirely
+        extraction = get_extraction('pdf', digest)
+        cached = extraction is not None
+        if cached:
+            print(f"⚡ Extraction cache hit for PDF {digest[:12]}")
+        else:
+            extraction = extract_pdf_pages(upload.path)
+            # Pages whose OCR failed are retried on the next upload, not cached as empty
+            if not extraction['ocr_skipped']:
+                store_extraction('pdf', digest, extraction)
+        pages = extraction['pages']
         
-        if not text.strip():
+        if not any(page.strip() for page in pages):
             return jsonify({'error': 'Could not extract text from PDF'}), 400
         
-        # Summarize the extracted text
-        result = genrate_sumary(text)
+        # Summarize the extracted text, chunked on page boundaries for long documents
+        result = summarize_long_text(pages)
+        if 'error' not in result:
+            result['extraction'] = {
+                'pages': extraction['page_count'],
+                'workers': extraction['workers'],
+                'total_ms': extraction['total_ms'],
+                'page_timings_ms': extraction['page_timings_ms'],
+                'page_methods': extraction['page_methods'],
+                'ocr_pages': extraction['ocr_pages'],
+                'cached': cached
+            }
         return jsonify(result)
     
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _ocr_unavailable_response(filename):
+    """Demo payload returned with 200 when Tesseract is not usable on this machine"""
+    reason = OCR_STATUS.get('reason')
+    if reason == 'missing_dependencies':
+        demo_text = 'Demo OCR Result: This is sample extracted text from your handwritten notes. The actual OCR functionality requires Tesseract to be installed on your system.'
+    elif reason == 'not_found':
+        demo_text = f'Demo OCR Result: This is sample extracted text from your image "{filename}". Please ensure Tesseract is installed at C:\\Program Files\\Tesseract-OCR\\'
+    else:
+        demo_text = f'Demo OCR Result: This is sample extracted text from your image "{filename}". Tesseract is installed but not accessible. Error: {OCR_STATUS["details"]}'
+    return {'error': OCR_STATUS['error'], 'details': OCR_STATUS['details'], 'extracted_text': demo_text}
+
 @summary_bp.route('/api/ocr', methods=['POST'])
 def extract_text_ocr():
-    temp_file_path = None
+    request.max_content_length = IMAGE_MAX_UPLOAD_BYTES
     try:
         if 'image' not in request.files:
             return jsonify({'error': 'No image file provided'}), 400
         
         image_file = request.files['image']
         
-        # Check if Tesseract is available
-        try:
-            import pytesseract
-            from PIL import Image
-        except ImportError as e:
-            return jsonify({
-                'error': 'OCR dependencies not installed',
-                'details': 'Please install: pip install pytesseract Pillow',
-                'extracted_text': 'Demo OCR Result: This is sample extracted text from your handwritten notes. The actual OCR functionality requires Tesseract to be installed on your system.'
-            }), 200  # Return 200 with demo data instead of error
-        
-        # Set Tesseract path for Windows - YOUR EXACT PATH
-        if platform.system() == 'Windows':
-            # Your confirmed Tesseract installation path
-            tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-            
-            if os.path.exists(tesseract_path):
-                pytesseract.pytesseract.tesseract_cmd = tesseract_path
-                print(f"✅ Found Tesseract at: {tesseract_path}")
-            else:
-                # Fallback paths if the main one doesn't work
-                possible_paths = [
-                    r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-                    r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-                    r'C:\Users\{}\AppData\Local\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', '')),
-                    r'C:\tesseract\tesseract.exe'
-                ]
-                
-                tesseract_found = False
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        pytesseract.pytesseract.tesseract_cmd = path
-                        print(f"✅ Found Tesseract at: {path}")
-                        tesseract_found = True
-                        break
-                
-                if not tesseract_found:
-                    return jsonify({
-                        'error': 'Tesseract OCR not found',
-                        'details': f'Searched paths: {possible_paths}',
-                        'extracted_text': f'Demo OCR Result: This is sample extracted text from your image "{image_file.filename}". Please ensure Tesseract is installed at C:\\Program Files\\Tesseract-OCR\\'
-                    }), 200
-        
-        # Check if Tesseract executable is accessible
-        try:
-            version = pytesseract.get_tesseract_version()
-            print(f"✅ Tesseract version: {version}")
-        except Exception as e:
-            return jsonify({
-                'error': 'Tesseract OCR not accessible',
-                'details': str(e),
-                'extracted_text': f'Demo OCR Result: This is sample extracted text from your image "{image_file.filename}". Tesseract is installed but not accessible. Error: {str(e)}'
-            }), 200  # Return 200 with demo data instead of error
+        # Hashed as it streamed in, so repeat uploads skip OCR entirely
+        upload = receive_upload(image_file)
+        digest = upload.sha256
+        
+        cached = get_extraction('ocr', digest)
+        if cached is not None:
+            print(f"⚡ Extraction cache hit for image {digest[:12]}")
+            extracted_text = cached['text']
+            if not extracted_text.strip():
+                return jsonify({
+                    'extracted_text': 'No text found in this image. Please try with an image that contains clear, readable text.'
+                }), 200
+            return jsonify({'extracted_text': extracted_text.strip()})
+        
+        # Tesseract is detected once at startup; without it, answer with demo text as before
+        if not OCR_STATUS['available']:
+            return jsonify(_ocr_unavailable_response(image_file.filename)), 200
         
-        # Create temporary file with better Windows handling
         try:
-            # Create temp file but don't auto-delete
-            temp_fd, temp_file_path = tempfile.mkstemp(suffix='.png', prefix='mentora_ocr_')
-            
-            # Close the file descriptor immediately to release the lock
-            os.close(temp_fd)
-            
-            # Save the uploaded image to the temp file
-            with open(temp_file_path, 'wb') as f:
-                image_file.seek(0)  # Reset file pointer
-                f.write(image_file.read())
-            
             print(f"🔍 Processing OCR for image: {image_file.filename}")
-            print(f"📁 Temp file created: {temp_file_path}")
-            
-            # Process OCR
-            image = Image.open(temp_file_path)
-            extracted_text = pytesseract.image_to_string(image, lang='eng')
             
-            # Close the image to release any locks
-            image.close()
+            # The spooled upload goes straight to a warm OCR worker, no temp file
+            result = ocr_image(upload)
+            extracted_text = result['text']
+            if 'preprocess' in result:
+                print(f"🧼 Preprocessed to {result['preprocess']['size']}: {result['preprocess']['timings_ms']}")
             
-            # Small delay to ensure file handles are released
-            time.sleep(0.1)
+            store_extraction('ocr', digest, {'text': extracted_text})
             
             if not extracted_text.strip():
                 return jsonify({
                     'extracted_text': 'No text found in this image. Please try with an image that contains clear, readable text.'
                 }), 200
             
-            print(f"✅ OCR Success: Extracted {len(extracted_text)} characters")
+            print(f"✅ OCR Success: Extracted {len(extracted_text)} characters in {result['ms']} ms")
             print(f"📝 Preview: {extracted_text[:100]}...")
             
             return jsonify({'extracted_text': extracted_text.strip()})
@@ -161,26 +148,113 @@ def extract_text_ocr():
                 'extracted_text': f'Demo OCR Result: Sample text extracted from "{image_file.filename}". The image appears to contain handwritten notes about study materials. OCR failed with: {str(ocr_error)}'
             }), 200
     
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         print(f"❌ Server Error: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+def _collect_batch_pages(files):
+    """One job per page of every uploaded image, in upload order, with cached text where available"""
+    jobs = []
+    for image_file in files:
+        upload = receive_upload(image_file)
+        try:
+            sources = split_pages(upload)
+        except Exception:
+            raise ValueError(f'"{image_file.filename}" is not a supported image file')
+        for frame, source in enumerate(sources):
+            # Pages of a multi-page file are cached individually
+            cache_id = upload.sha256 if len(sources) == 1 else f"{upload.sha256}:{frame}"
+            job = {
+                'page': len(jobs) + 1,
+                'filename': image_file.filename,
+                'frame': frame,
+                'cache_id': cache_id,
+                'cached': get_extraction('ocr', cache_id),
+                'source': source
+            }
+            jobs.append(job)
+    return jobs
+
+
+def _batch_results(jobs):
+    """Yield one result per page in page order, each as soon as it and all earlier pages are done"""
+    for job in jobs:
+        page = {'page': job['page'], 'filename': job['filename'], 'frame': job['frame']}
+        if job['cached'] is not None:
+            page.update({'text': job['cached']['text'].strip(), 'ms': 0, 'cached': True})
+        else:
+            try:
+                result = job['future'].result()
+            except Exception as e:
+                print(f"❌ OCR Error on page {job['page']}: {str(e)}")
+                page['error'] = str(e)
+                yield page
+                continue
+            store_extraction('ocr', job['cache_id'], {'text': result['text']})
+            page.update({'text': result['text'].strip(), 'ms': result['ms'], 'cached': False})
+        yield page
+
+
+def _batch_summary(pages, started):
+    return {
+        'extracted_text': '\n\n'.join(page['text'] for page in pages if page.get('text')),
+        'page_count': len(pages),
+        'failed_pages': [page['page'] for page in pages if 'error' in page],
+        'total_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+def _stream_batch(jobs, started):
+    pages = []
+    try:
+        for page in _batch_results(jobs):
+            pages.append(page)
+            yield format_sse(page, event='page')
+        yield format_sse(_batch_summary(pages, started), event='done')
+    except Exception as e:
+        print(f"❌ Streaming error: {str(e)}")
+        yield format_sse({'error': str(e)}, event='error')
+
+
+@summary_bp.route('/api/ocr/batch', methods=['POST'])
+def extract_text_ocr_batch():
+    request.max_content_length = MAX_UPLOAD_BYTES
+    try:
+        files = request.files.getlist('images') or request.files.getlist('image')
+        if not files:
+            return jsonify({'error': 'No image files provided'}), 400
+        
+        if not OCR_STATUS['available']:
+            return jsonify({'error': OCR_STATUS['error'], 'details': OCR_STATUS['details']}), 503
+        
+        started = time.perf_counter()
+        try:
+            jobs = _collect_batch_pages(files)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if len(jobs) > OCR_BATCH_MAX_PAGES:
+            return jsonify({'error': f'Too many pages. Maximum is {OCR_BATCH_MAX_PAGES} per request.'}), 400
+        
+        # Every uncached page goes on the OCR pool at once, so pages run in parallel up to OCR_MAX_WORKERS
+        print(f"🔍 Batch OCR: {len(jobs)} page(s) from {len(files)} file(s)")
+        for job in jobs:
+            if job['cached'] is None:
+                job['future'] = submit_ocr(job['source'])
+        
+        # Streaming only changes how the results are delivered
+        if wants_stream(request):
+            return sse_response(_stream_batch(jobs, started))
+        
+        pages = list(_batch_results(jobs))
+        result = _batch_summary(pages, started)
+        result['pages'] = pages
+        return jsonify(result)
     
-    finally:
-        # Clean up temp file with retry mechanism for Windows
-        if temp_file_path and os.path.exists(temp_file_path):
-            max_retries = 5
-            for attempt in range(max_retries):
-                try:
-                    os.unlink(temp_file_path)
-                    print(f"🗑️ Cleaned up temp file: {temp_file_path}")
-                    break
-                except PermissionError as e:
-                    if attempt < max_retries - 1:
-                        print(f"⚠️ Retry {attempt + 1}/{max_retries}: File still locked, waiting...")
-                        time.sleep(0.2)  # Wait 200ms before retry
-                    else:
-                        print(f"⚠️ Warning: Could not delete temp file {temp_file_path}: {e}")
-                        # File will be cleaned up by system temp cleanup eventually
-                except Exception as e:
-                    print(f"⚠️ Warning: Error deleting temp file {temp_file_path}: {e}")
-                    break
\ No newline at end of file
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        print(f"❌ Server Error: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -1,6 +1,8 @@
 from flask import Flask, Blueprint, request, jsonify
-from services.gemini_service import genrate_sumary
+from services.chapter_service import summarize_chapters
 from services.youtube_service import process_youtube_video
+from services.playlist_service import summarize_playlist, PLAYLIST_MAX_VIDEOS
+from services.streaming import wants_stream, format_sse, sse_response
 
 youtube_bp = Blueprint('youtube', __name__)
 
@@ -55,8 +57,8 @@ def summarize_youtube():
                 ]
             }), 400
         
-        # Summarize the transcript
-        summary_result = genrate_sumary(video_data['transcript'])
+        # Summarize the transcript chapter by chapter, keeping each chapter's timestamps
+        summary_result = summarize_chapters(video_data['segments'], video_data['chapters'])
         
         if 'error' in summary_result:
             return jsonify({
@@ -81,16 +83,22 @@ def summarize_youtube():
         return jsonify({
             'success': True,
             'summary': summary_result['Summary'],
+            'chapters': [
+                dict(chapter, url=f"https://www.youtube.com/watch?v={video_data['video_id']}&t={int(chapter['start'])}s")
+                for chapter in summary_result['chapters']
+            ],
             'video_info': {
                 'video_id': video_data['video_id'],
                 'title': video_data['title'],
                 'duration': video_data.get('duration'),
-                'transcript_length': video_data.get('transcript_length', 0)
+                'transcript_length': video_data.get('transcript_length', 0),
+                'chapter_source': 'description' if video_data['chapters'] else 'time_windows'
             },
             'metadata': {
                 'processing_time': 'Generated in real-time',
                 'content_type': 'educational',
-                'quality': 'high' if video_data.get('transcript_length', 0) > 500 else 'medium'
+                'quality': 'high' if video_data.get('transcript_length', 0) > 500 else 'medium',
+                'transcript_cleanup': video_data.get('cleanup')
             }
         })
     
@@ -106,4 +114,57 @@ def summarize_youtube():
                 'Contact support if you continue experiencing issues'
             ],
             'technical_details': str(e) if str(e) else 'Unknown server error'
-        }), 500
\ No newline at end of file
+        }), 500
+
+def _stream_playlist(events):
+    try:
+        for event, payload in events:
+            yield format_sse(payload, event=event)
+    except Exception as e:
+        print(f"❌ Streaming error: {str(e)}")
+        yield format_sse({'error': str(e)}, event='error')
+
+@youtube_bp.route('/api/summarize-youtube-playlist', methods=['POST'])
+def summarize_youtube_playlist():
+    try:
+        data = request.get_json(silent=True) or {}
+        url = data.get("url", '').strip()
+        
+        if not url:
+            return jsonify({
+                'success': False,
+                'error': 'No playlist URL provided',
+                'message': 'Please provide a YouTube playlist or channel URL to summarize'
+            }), 400
+        
+        try:
+            max_videos = int(data.get('max_videos', PLAYLIST_MAX_VIDEOS))
+        except (TypeError, ValueError):
+            max_videos = 0
+        if max_videos < 1:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid max_videos',
+                'message': f'max_videos must be a whole number between 1 and {PLAYLIST_MAX_VIDEOS}'
+            }), 400
+        max_videos = min(max_videos, PLAYLIST_MAX_VIDEOS)
+        events = summarize_playlist(url, max_videos)
+        
+        # Whole courses take minutes, so streaming reports each video as it finishes
+        if wants_stream(request, data):
+            return sse_response(_stream_playlist(events))
+        
+        for event, payload in events:
+            if event == 'error':
+                return jsonify({'success': False, 'error': payload['error']}), 400
+            if event == 'done':
+                return jsonify(payload)
+    
+    except Exception as e:
+        print(f"YouTube API Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Server error',
+            'message': 'An unexpected error occurred while processing the playlist',
+            'technical_details': str(e) if str(e) else 'Unknown server error'
+        }), 500
@@ -2,78 +2,30 @@ import os
 import requests
 import time
 from dotenv import load_dotenv
+from services.resilience import Upstream, RetryPolicy, is_transient_response, is_rejected_response
 
 load_dotenv()
 ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
 
+# Status polls are cheap lookups, so they are hedged; creating a transcript is not
+assemblyai_api = Upstream('assemblyai', RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=8.0))
+
 def transcribe_audio(file_path):
     try:
         # Upload audio to AssemblyAI
         headers = {'authorization': ASSEMBLYAI_API_KEY}
-        with open(file_path, 'rb') as f:
-            upload_response = requests.post(
-                "https://api.assemblyai.com/v2/upload",
-                headers=headers,
-                files={'file': f}
-            )
-
-        if upload_response.status_code != 200:
-            return {"error": "Audio upload failed", "details": upload_response.text}
-
-        audio_url = upload_response.json()['upload_url']
-
-        # Start transcription
-        transcript_request = {
-            "audio_url": audio_url
-        }
-
-        transcript_response = requests.post(
-            "https://api.assemblyai.com/v2/transcript",
-            json=transcript_request,
-            headers=headers
-        )
-
-        if transcript_response.status_code != 200:
-            return {"error": "Transcription request failed", "details": transcript_response.text}
-
-        transcript_id = transcript_response.json()["id"]
-
-        # Poll until transcription is done
-        while True:
-            status_response = requests.get(
-                f"https://api.assemblyai.com/v2/transcript/{transcript_id}",
-                headers=headers
-            )
-            status_data = status_response.json()
 
-            if status_data["status"] == "completed":
-                return {"text": status_data["text"]}
-            elif status_data["status"] == "failed":
-                return {"error": "Transcription failed"}
+        def upload():
+            # Reopen on every attempt so a retry sends the whole file again
+            with open(file_path, 'rb') as f:
+                return requests.post(
+                    "https://api.assemblyai.com/v2/upload",
+                    headers=headers,
+                    files={'file': f},
+                    timeout=(5, 120)
+                )
 
-            time.sleep(2)
-
-    except Exception as e:
-        return {"error": str(e)}
-
-import os
-import requests
-import time
-from dotenv import load_dotenv
-
-load_dotenv()
-ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
-
-def transcribe_audio(file_path):
-    try:
-        # Upload audio to AssemblyAI
-        headers = {'authorization': ASSEMBLYAI_API_KEY}
-        with open(file_path, 'rb') as f:
-            upload_response = requests.post(
-                "https://api.assemblyai.com/v2/upload",
-                headers=headers,
-                files={'file': f}
-            )
+        upload_response = assemblyai_api.call(upload, retry_result=is_rejected_response, idempotent=False)
 
         if upload_response.status_code != 200:
             return {"error": "Audio upload failed", "details": upload_response.text}
@@ -85,10 +37,15 @@ def transcribe_audio(file_path):
             "audio_url": audio_url
         }
 
-        transcript_response = requests.post(
-            "https://api.assemblyai.com/v2/transcript",
-            json=transcript_request,
-            headers=headers
+        transcript_response = assemblyai_api.call(
+            lambda: requests.post(
+                "https://api.assemblyai.com/v2/transcript",
+                json=transcript_request,
+                headers=headers,
+                timeout=(5, 30)
+            ),
+            retry_result=is_rejected_response,
+            idempotent=False
         )
 
         if transcript_response.status_code != 200:
@@ -98,9 +55,14 @@ def transcribe_audio(file_path):
 
         # Poll until transcription is done
         while True:
-            status_response = requests.get(
-                f"https://api.assemblyai.com/v2/transcript/{transcript_id}",
-                headers=headers
+            status_response = assemblyai_api.call(
+                lambda: requests.get(
+                    f"https://api.assemblyai.com/v2/transcript/{transcript_id}",
+                    headers=headers,
+                    timeout=(5, 10)
+                ),
+                retry_result=is_transient_response,
+                hedge=True
             )
             status_data = status_response.json()
 
@@ -112,4 +74,4 @@ def transcribe_audio(file_path):
             time.sleep(2)
 
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
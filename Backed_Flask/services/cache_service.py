@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+CACHE_DIR = os.getenv(
+    'MENTORA_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+)
+CACHE_DB_PATH = os.path.join(CACHE_DIR, 'mentora_cache.sqlite3')
+CACHE_ENABLED = os.getenv('MENTORA_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+# Every cache created in this process, so stats can be reported in one place
+_caches = {}
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies of a text share a key"""
+    return ' '.join(str(text).split())
+
+
+def make_cache_key(*parts):
+    """Build a content-addressed key from any JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache: an in-process LRU in front of a shared SQLite file.
+    Values must be JSON-serializable. Entries expire after their TTL and both
+    tiers are size-bounded (least recently used entries are evicted first).
+    """
+
+    def __init__(self, namespace, max_memory_entries=256, max_disk_entries=5000,
+                 default_ttl=24 * 3600, db_path=CACHE_DB_PATH):
+        self.namespace = namespace
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.default_ttl = default_ttl
+        self.db_path = db_path
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes_since_prune = 0
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+        self._disk_enabled = True
+        try:
+            self._init_db()
+        except Exception as e:
+            print(f"⚠️ Cache '{namespace}' running memory-only, SQLite unavailable: {e}")
+            self._disk_enabled = False
+
+        _caches[namespace] = self
+
+    # ----- SQLite helpers -----
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, last_access)'
+        )
+        conn.commit()
+
+    def _disk_get(self, key, now):
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?',
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key))
+            conn.commit()
+            return None
+        conn.execute(
+            'UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?',
+            (now, self.namespace, key)
+        )
+        conn.commit()
+        return json.loads(value), expires_at
+
+    def _disk_set(self, key, value, expires_at, now):
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, last_access) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (self.namespace, key, json.dumps(value, ensure_ascii=False), expires_at, now)
+        )
+        conn.commit()
+
+        # Pruning scans the table, so only do it every so often
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= 50:
+            self._writes_since_prune = 0
+            self._disk_prune(now)
+
+    def _disk_prune(self, now):
+        conn = self._connect()
+        conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?', (self.namespace, now))
+        cursor = conn.execute("""
+            DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries WHERE namespace = ?
+                ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.namespace, self.namespace, self.max_disk_entries))
+        conn.commit()
+        if cursor.rowcount and cursor.rowcount > 0:
+            with self._lock:
+                self._counters['evictions'] += cursor.rowcount
+
+    # ----- Memory helpers -----
+
+    def _memory_set(self, key, value, expires_at):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    # ----- Public API -----
+
+    def get(self, key, default=None):
+        if not CACHE_ENABLED:
+            return default
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+        if self._disk_enabled:
+            try:
+                found = self._disk_get(key, now)
+            except Exception as e:
+                print(f"⚠️ Cache '{self.namespace}' disk read failed: {e}")
+                found = None
+            if found is not None:
+                value, expires_at = found
+                self._memory_set(key, value, expires_at)
+                with self._lock:
+                    self._counters['disk_hits'] += 1
+                return value
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        if not CACHE_ENABLED:
+            return
+
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.default_ttl)
+        self._memory_set(key, value, expires_at)
+        with self._lock:
+            self._counters['sets'] += 1
+
+        if self._disk_enabled:
+            try:
+                self._disk_set(key, value, expires_at, now)
+            except Exception as e:
+                print(f"⚠️ Cache '{self.namespace}' disk write failed: {e}")
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self._disk_enabled:
+            conn = self._connect()
+            conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key))
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk_enabled:
+            conn = self._connect()
+            conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries = len(self._memory)
+        lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+        hits = counters['memory_hits'] + counters['disk_hits']
+        counters.update({
+            'memory_entries': memory_entries,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'disk_enabled': self._disk_enabled
+        })
+        return counters
+
+
+def get_cache_stats():
+    """Hit/miss counters for every cache in this process, keyed by namespace"""
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
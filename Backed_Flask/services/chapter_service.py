@@ -0,0 +1,169 @@
+import os
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from services.summarization_service import summarize_long_text, CHUNK_TOKENS
+from services.gemini_service import summarize_chapter_batch
+from services.rate_limiter import estimate_tokens
+
+load_dotenv()
+# Videos without chapters in their description are split into windows of this length;
+# windows are only chapter boundaries, consecutive ones share a call up to SUMMARY_CHUNK_TOKENS
+CHAPTER_WINDOW_SECONDS = int(os.getenv('YOUTUBE_CHAPTER_MINUTES', '5')) * 60
+CHAPTER_WORKERS = int(os.getenv('YOUTUBE_CHAPTER_WORKERS', '8'))
+
+# Separate from the summarization pool: each chapter job waits on chunk jobs there
+_executor = ThreadPoolExecutor(max_workers=CHAPTER_WORKERS, thread_name_prefix='chapter')
+
+
+def format_timestamp(seconds):
+    """Seconds as a YouTube-style timestamp: 4:05 or 1:02:03"""
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+def _window_starts(end_of_video, window_seconds):
+    starts = list(range(0, int(end_of_video) + 1, window_seconds))
+    # Fold a short final window into the one before it
+    if len(starts) > 1 and end_of_video - starts[-1] < window_seconds / 2:
+        starts.pop()
+    return starts
+
+
+def group_segments(segments, chapters=None, window_seconds=CHAPTER_WINDOW_SECONDS):
+    """
+    Group [start, duration, text] caption segments into chapters: the video's
+    own chapters when it has them, otherwise fixed time windows. Returns
+    [{'title', 'start', 'end', 'text'}] in time order, skipping empty chapters.
+    """
+    if not segments:
+        return []
+    end_of_video = max(start + duration for start, duration, _ in segments)
+
+    if chapters:
+        starts = [chapter['start'] for chapter in chapters]
+        titles = [chapter['title'] for chapter in chapters]
+    else:
+        starts = _window_starts(end_of_video, window_seconds)
+        titles = [None] * len(starts)
+
+    texts = [[] for _ in starts]
+    for start, _, text in segments:
+        index = max(0, bisect.bisect_right(starts, start) - 1)
+        texts[index].append(text)
+
+    groups = []
+    for index, start in enumerate(starts):
+        if not texts[index]:
+            continue
+        end = starts[index + 1] if index + 1 < len(starts) else end_of_video
+        groups.append({
+            'title': titles[index] or f"{format_timestamp(start)} - {format_timestamp(end)}",
+            'start': start,
+            'end': round(end, 2),
+            'text': ' '.join(texts[index])
+        })
+    return groups
+
+
+def pack_groups(groups, max_tokens=CHUNK_TOKENS):
+    """Pack consecutive chapter groups so each pack fits in one prompt"""
+    packs = []
+    current = []
+    current_tokens = 0
+    for group in groups:
+        group_tokens = estimate_tokens(group['text'])
+        if current and current_tokens + group_tokens > max_tokens:
+            packs.append(current)
+            current = []
+            current_tokens = 0
+        current.append(group)
+        current_tokens += group_tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _merge_windows(pack):
+    """Time windows that share a call become one chapter labelled with their combined span"""
+    start, end = pack[0]['start'], pack[-1]['end']
+    return {
+        'title': f"{format_timestamp(start)} - {format_timestamp(end)}",
+        'start': start,
+        'end': end,
+        'text': ' '.join(group['text'] for group in pack)
+    }
+
+
+def _summarize_pack(pack, described):
+    """Summaries for one pack of chapters as [(group, result)]; never raises"""
+    try:
+        if not described:
+            group = _merge_windows(pack)
+            return [(group, summarize_long_text(group['text']))]
+        if len(pack) == 1:
+            # A single chapter may be longer than one prompt, so it gets the map-reduce tree
+            return [(pack[0], summarize_long_text(pack[0]['text']))]
+
+        result = summarize_chapter_batch([(group['title'], group['text']) for group in pack])
+        if 'error' in result:
+            return [(group, result) for group in pack]
+        return [(group, {'Summary': summary}) for group, summary in zip(pack, result['summaries'])]
+    except Exception as e:
+        return [(group, {'error': str(e)}) for group in pack]
+
+
+def summarize_chapters(segments, chapters=None):
+    """
+    Chaptered summary of a timed transcript. Consecutive chapters are packed
+    into prompts of up to SUMMARY_CHUNK_TOKENS, so a long lecture needs about
+    as many calls as plain chunked summarization, and the packs are summarized
+    concurrently. Without description chapters, each pack becomes one chapter
+    spanning its time windows. A chapter whose summary failed carries an
+    'error' instead of a summary; the rest are combined into one overview.
+    Returns {'Summary', 'chapters': [{'title', 'start', 'end', 'timestamp', 'summary'}]}
+    or {'error': ...} when no chapter could be summarized.
+    """
+    try:
+        groups = group_segments(segments, chapters)
+        if not groups:
+            return {'error': 'No text provided'}
+
+        packs = pack_groups(groups)
+        print(f"📑 Summarizing {len(groups)} chapter(s) in {len(packs)} call(s)")
+        futures = [_executor.submit(_summarize_pack, pack, bool(chapters)) for pack in packs]
+
+        summaries = []
+        first_error = None
+        for future in futures:
+            for group, result in future.result():
+                chapter = {
+                    'title': group['title'],
+                    'start': group['start'],
+                    'end': group['end'],
+                    'timestamp': format_timestamp(group['start']),
+                    'summary': result.get('Summary')
+                }
+                if 'error' in result:
+                    chapter['error'] = result['error']
+                    first_error = first_error or result
+                summaries.append(chapter)
+
+        summarized = [chapter for chapter in summaries if chapter['summary']]
+        if not summarized:
+            return first_error
+        if len(summarized) == 1:
+            return {'Summary': summarized[0]['summary'], 'chapters': summaries}
+
+        overview = summarize_long_text([
+            f"{chapter['timestamp']} {chapter['title']}\n{chapter['summary']}" for chapter in summarized
+        ])
+        if 'error' in overview:
+            return overview
+        return {'Summary': overview['Summary'], 'chapters': summaries}
+
+    except Exception as e:
+        return {"error": str(e)}
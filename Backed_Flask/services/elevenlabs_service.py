@@ -3,10 +3,14 @@ import os
 import tempfile
 import base64
 from dotenv import load_dotenv
+from services.resilience import Upstream, RetryPolicy, is_transient_response, is_rejected_response
 
 load_dotenv()
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 
+# Speech generation is billed per character, so it is retried but never hedged
+elevenlabs_api = Upstream('elevenlabs', RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4.0))
+
 def text_to_speech(text, voice_id="21m00Tcm4TlvDq8ikWAM", emotion="neutral", speed=1.0, pitch=1.0):
     """
     Convert text to speech using ElevenLabs API with emotion and character support
@@ -70,7 +74,11 @@ def text_to_speech(text, voice_id="21m00Tcm4TlvDq8ikWAM", emotion="neutral", spe
     
     try:
         print(f"🌐 Making request to ElevenLabs API...")
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = elevenlabs_api.call(
+            lambda: requests.post(url, json=data, headers=headers, timeout=(5, 30)),
+            retry_result=is_rejected_response,
+            idempotent=False
+        )
         
         print(f"📡 ElevenLabs Response Status: {response.status_code}")
         
@@ -135,7 +143,11 @@ def get_available_voices():
     headers = {"xi-api-key": ELEVENLABS_API_KEY}
     
     try:
-        response = requests.get(url, headers=headers)
+        response = elevenlabs_api.call(
+            lambda: requests.get(url, headers=headers, timeout=(5, 10)),
+            retry_result=is_transient_response,
+            hedge=True
+        )
         if response.status_code == 200:
             voices = response.json().get("voices", [])
             
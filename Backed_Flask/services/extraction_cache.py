@@ -0,0 +1,28 @@
+from services.cache_service import TieredCache, make_cache_key
+from services.ocr_service import OCR_STATUS
+
+# Bump when PDF or OCR extraction changes so old results are not reused
+EXTRACTION_VERSION = 4
+
+# Extracted text is large, so only a few entries stay in memory; the rest live on disk
+extraction_cache = TieredCache(
+    'extraction',
+    max_memory_entries=32,
+    max_disk_entries=2000,
+    default_ttl=30 * 24 * 3600
+)
+
+
+def _key(kind, digest):
+    # Scanned pages come out empty without an OCR engine, so results are keyed by
+    # the engine and are extracted again once one is installed
+    return make_cache_key(kind, EXTRACTION_VERSION, OCR_STATUS.get('engine') or 'none', digest)
+
+
+def get_extraction(kind, digest):
+    """Cached extraction result for an upload's SHA-256 digest, or None"""
+    return extraction_cache.get(_key(kind, digest))
+
+
+def store_extraction(kind, digest, result):
+    extraction_cache.set(_key(kind, digest), result)
@@ -1,56 +1,391 @@
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from services.cache_service import TieredCache, make_cache_key, normalize_text
+from services.singleflight import SingleFlight
+from services.rate_limiter import RateLimitedClient
+from services.resilience import Upstream, RetryPolicy
+from services.llm_backend import get_backend
 
 load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-if not os.getenv("GEMINI_API_KEY"):
-    raise EnvironmentError("GEMINI_API_KEY is missing.")
+# Gemini by default; LLM_BACKEND=stub swaps in a deterministic offline backend for load tests
+backend = get_backend()
+MODEL_NAME = backend.model_name
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash-latest")
+# Shared by every request thread, so it is wrapped to stay inside Gemini's RPM/TPM quotas
+model = RateLimitedClient(
+    backend,
+    name='gemini',
+    max_concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY', '8')),
+    requests_per_minute=int(os.getenv('GEMINI_RPM', '15')),
+    tokens_per_minute=int(os.getenv('GEMINI_TPM', '1000000')),
+    queue_timeout=float(os.getenv('GEMINI_QUEUE_TIMEOUT', '30'))
+)
 
+# Bump a prompt's version whenever its template changes so stale cached answers are not served
+PROMPT_VERSIONS = {
+    'summary': 1,
+    'chunk_summary': 1,
+    'combine_summaries': 1,
+    'chapter_summaries': 1,
+    'quiz': 2,
+    'quiz_repair': 1,
+    'answer': 1,
+    'story': 1,
+    'story_title': 1,
+    'study_plan': 1
+}
+
+# How long (seconds) each kind of response stays cached
+CACHE_TTLS = {
+    'summary': 7 * 24 * 3600,
+    'chunk_summary': 7 * 24 * 3600,
+    'combine_summaries': 7 * 24 * 3600,
+    'chapter_summaries': 7 * 24 * 3600,
+    # quiz_repair is not cached: a repair round that got nothing usable must ask again
+    'quiz': 24 * 3600,
+    'answer': 24 * 3600,
+    'story': 24 * 3600,
+    'story_title': 24 * 3600,
+    'study_plan': 3 * 24 * 3600
+}
+
+llm_cache = TieredCache('gemini', max_memory_entries=512, max_disk_entries=20000)
+
+# Identical prompts already in flight are shared instead of sent to Gemini again
+inflight_requests = SingleFlight('gemini')
+
+# Runs secondary prompts (e.g. story titles) alongside the main one
+_side_requests = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini-side')
+
+# Transient Gemini failures are retried, slow calls hedged, and an outage trips the breaker.
+# Each attempt takes its limiter slot first, so only Gemini's own latency is timed and hedged.
+gemini_api = Upstream('gemini', RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4.0), hedge=True, limiter=model)
+
+
+def _cache_key(kind, prompt, generation_config=None):
+    """Content-addressed cache key for a prompt, or None if this kind is not cached"""
+    if kind not in CACHE_TTLS:
+        return None
+    return make_cache_key(MODEL_NAME, kind, PROMPT_VERSIONS[kind], normalize_text(prompt), generation_config)
+
+
+def _generate_text(kind, prompt, generation_config=None, accept=None):
+    """
+    Run a prompt through Gemini and return the response text.
+    Responses for cacheable kinds are keyed by a hash of the model, prompt
+    version and normalized prompt, so identical requests skip the LLM call,
+    and identical requests that arrive while one is in flight wait for it.
+    accept(text) -> bool, when given, must pass before a response is cached,
+    so a truncated or invalid response is not replayed until its TTL runs out.
+    """
+    def generate():
+        # The backend itself: gemini_api holds the rate limiter slot around this call
+        return backend.generate_content(prompt, generation_config=generation_config)
+
+    def call_upstream():
+        return gemini_api.call(generate, cost=model.estimate_cost(prompt)).text
+
+    cache_key = _cache_key(kind, prompt, generation_config)
+    if not cache_key:
+        return call_upstream()
+
+    cached_text = llm_cache.get(cache_key)
+    if cached_text is not None:
+        print(f"⚡ Cache hit for {kind} ({len(cached_text)} characters)")
+        return cached_text
+
+    def call_gemini():
+        text = call_upstream()
+        # Cache before releasing waiters so no late caller misses both
+        if accept is None or accept(text):
+            llm_cache.set(cache_key, text, ttl=CACHE_TTLS[kind])
+        else:
+            print(f"⚠️ Not caching {kind} response that failed validation")
+        return text
+
+    return inflight_requests.do(cache_key, call_gemini)
+
+
+def _stream_text(kind, prompt):
+    """
+    Like _generate_text, but yields the response in pieces as Gemini produces them.
+    A cached response is yielded in one piece; a completed stream is cached.
+    """
+    cache_key = _cache_key(kind, prompt)
+    if cache_key:
+        cached_text = llm_cache.get(cache_key)
+        if cached_text is not None:
+            print(f"⚡ Cache hit for {kind} ({len(cached_text)} characters)")
+            yield cached_text
+            return
+
+    parts = []
+    # Through gemini_api so an open circuit fails fast and stream failures count against it
+    for chunk in gemini_api.stream(lambda: model.generate_content(prompt, stream=True)):
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks that only carry finish metadata have no text parts
+            continue
+        if text:
+            parts.append(text)
+            yield text
+
+    if cache_key and parts:
+        llm_cache.set(cache_key, ''.join(parts), ttl=CACHE_TTLS[kind])
+
+
+def _summary_prompt(text):
+    return f"Summarize the following text:\n\n{text}"
 
 def genrate_sumary(text):
     try:
-        prompt = f"Summarize the following text:\n\n{text}"
-        responce = model.generate_content(prompt)
-        return {'Summary':responce.text}
+        prompt = _summary_prompt(text)
+        summary_text = _generate_text('summary', prompt)
+        return {'Summary':summary_text}
+    except Exception as e:
+        return {"error": str(e)}
+
+def summarize_chunk(text, part, total_parts):
+    """
+    Summarize one section of a longer document (map step of map-reduce summarization)
+    """
+    try:
+        prompt = f"""
+You are summarizing part {part} of {total_parts} of a longer document.
+Write a concise summary of this part that keeps every key concept, definition, fact and example,
+so it can later be merged with the summaries of the other parts. Do not add an introduction or conclusion.
+
+Text:
+{text}
+"""
+        summary_text = _generate_text('chunk_summary', prompt)
+        return {'Summary': summary_text}
+    except Exception as e:
+        return {"error": str(e)}
+
+def combine_summaries(summaries):
+    """
+    Merge summaries of consecutive document sections into one (reduce step of map-reduce summarization)
+    """
+    try:
+        sections = "\n\n".join(f"Section {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+        prompt = f"""
+The following are summaries of consecutive sections of one document, in order.
+Combine them into a single coherent summary of the whole. Remove repetition, keep the
+original order of ideas, and keep all key concepts, definitions and facts.
+
+{sections}
+"""
+        summary_text = _generate_text('combine_summaries', prompt)
+        return {'Summary': summary_text}
+    except Exception as e:
+        return {"error": str(e)}
+
+CHAPTER_SUMMARIES_GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': {
+        'type': 'OBJECT',
+        'properties': {
+            'chapters': {
+                'type': 'ARRAY',
+                'items': {
+                    'type': 'OBJECT',
+                    'properties': {'summary': {'type': 'STRING'}},
+                    'required': ['summary']
+                }
+            }
+        },
+        'required': ['chapters']
+    }
+}
+
+def _parse_chapter_summaries(summaries_json, count):
+    """The first `count` non-empty chapter summaries from the JSON response, or None if there are fewer"""
+    try:
+        items = json.loads(summaries_json)['chapters']
+        summaries = [str(item.get('summary', '')).strip() for item in items[:count]]
+    except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+        return None
+    if len(summaries) < count or not all(summaries):
+        return None
+    return summaries
+
+def summarize_chapter_batch(chapters):
+    """
+    Summarize several consecutive chapters of one video in a single call.
+    chapters is a list of (title, text); returns {'summaries': [...]} with one
+    summary per chapter, in order, or {'error': ...}.
+    """
+    try:
+        sections = "\n\n".join(
+            f"Chapter {i + 1}: {title}\n{text}" for i, (title, text) in enumerate(chapters)
+        )
+        prompt = f"""
+The following are {len(chapters)} consecutive chapters of one video transcript.
+Write a concise summary of each chapter that keeps its key concepts, definitions, facts and examples.
+Return exactly {len(chapters)} summaries, one per chapter, in the same order.
+
+{sections}
+"""
+        summaries_json = _generate_text(
+            'chapter_summaries', prompt, CHAPTER_SUMMARIES_GENERATION_CONFIG,
+            accept=lambda text: _parse_chapter_summaries(text, len(chapters)) is not None
+        )
+        summaries = _parse_chapter_summaries(summaries_json, len(chapters))
+        if summaries is None:
+            return {"error": f"Expected {len(chapters)} chapter summaries in the response"}
+        return {'summaries': summaries}
     except Exception as e:
         return {"error": str(e)}
     
+QUIZ_OPTION_LETTERS = ['A', 'B', 'C', 'D']
+MAX_QUIZ_REPAIR_ROUNDS = 2
+
+# Gemini's JSON mode is constrained to this schema, so responses parse without regexes
+QUIZ_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'questions': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'question': {'type': 'STRING'},
+                    'options': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+                    'answer_index': {'type': 'INTEGER'},
+                    'explanation': {'type': 'STRING'},
+                    'source_quote': {'type': 'STRING'}
+                },
+                'required': ['question', 'options', 'answer_index', 'source_quote']
+            }
+        }
+    },
+    'required': ['questions']
+}
+
+QUIZ_GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': QUIZ_SCHEMA
+}
+
+
+def _quiz_style(difficulty):
+    # Set prompt style based on difficulty
+    if difficulty.lower() == "beginner":
+        return "Ask basic, direct questions that test fundamental understanding. Use simple language."
+    elif difficulty.lower() == "intermediate":
+        return "Ask moderately challenging questions that require some reasoning, application, or synthesis. Mix in a few scenario-based questions."
+    else:  # Advanced/Difficult
+        return "Ask challenging, tactical questions that require deep reasoning, analysis, and problem-solving. Use case studies, multi-step reasoning, or questions that require connecting concepts."
+
+
+def _find_source_span(source_text, quote):
+    """Locate a quoted passage in the source text, tolerating case and whitespace differences"""
+    quote = (quote or '').strip()
+    if not quote:
+        return None
+    start = source_text.find(quote)
+    if start != -1:
+        return {'start': start, 'end': start + len(quote), 'text': quote}
+    pattern = r'\s+'.join(re.escape(word) for word in quote.split())
+    match = re.search(pattern, source_text, re.IGNORECASE)
+    if match:
+        return {'start': match.start(), 'end': match.end(), 'text': match.group(0)}
+    return None
+
+
+def validate_quiz_question(raw, source_text):
+    """
+    Check one question object from Gemini.
+    Returns (question, None) when usable, or (None, reason) when it needs replacing.
+    """
+    if not isinstance(raw, dict):
+        return None, 'not an object'
+
+    question = str(raw.get('question', '')).strip()
+    if not question:
+        return None, 'missing question text'
+
+    options = raw.get('options')
+    if not isinstance(options, list) or len(options) != len(QUIZ_OPTION_LETTERS):
+        return None, f'expected {len(QUIZ_OPTION_LETTERS)} options'
+    # Models sometimes keep the "A) " prefix inside the option text
+    options = [re.sub(r'^\s*[A-D][).:]\s+', '', str(option)).strip() for option in options]
+    if not all(options) or len({option.lower() for option in options}) != len(options):
+        return None, 'empty or duplicate options'
+
+    answer_index = raw.get('answer_index')
+    if isinstance(answer_index, bool) or not isinstance(answer_index, int) or not 0 <= answer_index < len(options):
+        return None, 'answer_index out of range'
+
+    # A question we cannot tie back to the text may be invented, so it is replaced too
+    source_span = _find_source_span(source_text, raw.get('source_quote'))
+    if source_span is None:
+        return None, 'source_quote missing or not found in the text'
+
+    return {
+        'question': question,
+        'options': options,
+        'answer_index': answer_index,
+        'answer': QUIZ_OPTION_LETTERS[answer_index],
+        'explanation': str(raw.get('explanation', '')).strip(),
+        'source_span': source_span
+    }, None
+
+
+def _parse_quiz_questions(quiz_json, source_text):
+    """Split Gemini's quiz JSON into valid questions and a count of broken ones"""
+    try:
+        items = json.loads(quiz_json).get('questions', [])
+    except (json.JSONDecodeError, AttributeError):
+        return [], None
+
+    valid = []
+    broken = 0
+    for raw in items:
+        question, reason = validate_quiz_question(raw, source_text)
+        if question is None:
+            print(f"⚠️ Dropping quiz question: {reason}")
+            broken += 1
+        elif question['question'].lower() not in {q['question'].lower() for q in valid}:
+            valid.append(question)
+        else:
+            broken += 1
+    return valid, broken
+
+
+def render_quiz_text(questions):
+    """Render questions in the "**Question N:** ... **Answer:** X" text format the frontend parses"""
+    blocks = ["Here is your quiz:"]
+    for number, question in enumerate(questions, start=1):
+        lines = [f"**Question {number}:** {question['question']}"]
+        lines += [f"{letter}) {option}" for letter, option in zip(QUIZ_OPTION_LETTERS, question['options'])]
+        lines.append(f"**Answer:** {question['answer']}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
 def genrate_Quiz(Paragraph, difficulty="Beginner"):
     try:
-        # Set question count and prompt style based on difficulty
-        if difficulty.lower() == "beginner":
-            style = "Ask basic, direct questions that test fundamental understanding. Use simple language."
-        elif difficulty.lower() == "intermediate":
-            style = "Ask moderately challenging questions that require some reasoning, application, or synthesis. Mix in a few scenario-based questions."
-        else:  # Advanced/Difficult
-            style = "Ask challenging, tactical questions that require deep reasoning, analysis, and problem-solving. Use case studies, multi-step reasoning, or questions that require connecting concepts."
+        style = _quiz_style(difficulty)
 
         prompt = f"""
-Generate a multiple choice quiz from the following text. Follow this EXACT format:
-
-**Question 1:** [Question text here]
-A) [Option A]
-B) [Option B] 
-C) [Option C]
-D) [Option D]
-**Answer:** [Letter only - A, B, C, or D]
-
-**Question 2:** [Question text here]
-A) [Option A]
-B) [Option B]
-C) [Option C] 
-D) [Option D]
-**Answer:** [Letter only - A, B, C, or D]
-
-Continue this pattern for 8-16 questions. Make sure each question tests understanding of the key concepts. 
+Generate a multiple choice quiz of 8-16 questions from the following text.
+Make sure each question tests understanding of the key concepts.
 {style}
 
+For every question give:
+- "question": the question text
+- "options": exactly 4 answer options, without letter prefixes
+- "answer_index": the 0-based index of the correct option
+- "explanation": one sentence on why that option is correct
+- "source_quote": a short passage copied word for word from the text that supports the answer
+
 Text to create quiz from:
 {Paragraph}
 """
@@ -58,48 +393,120 @@ Text to create quiz from:
         print(f"🤖 Sending prompt to Gemini (difficulty: {difficulty}):")
         print(f"   Prompt length: {len(prompt)} characters")
         
-        response = model.generate_content(prompt)
-        quiz_text = response.text
+        # Only a response whose every question validates is cached
+        parsed = {}
+        def accept(text):
+            parsed['quiz'] = _parse_quiz_questions(text, Paragraph)
+            questions, broken = parsed['quiz']
+            return bool(questions) and broken == 0
+
+        quiz_json = _generate_text('quiz', prompt, QUIZ_GENERATION_CONFIG, accept=accept)
+        questions, broken = parsed.get('quiz') or _parse_quiz_questions(quiz_json, Paragraph)
+        if broken is None:
+            return {"error": "Quiz response was not valid JSON"}
+        
+        # Only the broken questions are re-requested, not the whole quiz
+        repair_round = 0
+        while broken and repair_round < MAX_QUIZ_REPAIR_ROUNDS:
+            repair_round += 1
+            print(f"🔧 Re-requesting {broken} broken quiz question(s), round {repair_round}")
+            replacements = _request_quiz_questions(Paragraph, style, broken, questions)
+            questions.extend(replacements)
+            broken = max(broken - len(replacements), 0)
+        
+        if not questions:
+            return {"error": "Could not generate any valid quiz questions"}
         
         print(f"🤖 Gemini Response:")
-        print(f"   Response length: {len(quiz_text)} characters")
-        print(f"   Response preview: {quiz_text[:300]}...")
+        print(f"   Valid questions: {len(questions)}")
         
-        return {'Your Quiz': quiz_text}
+        return {'Your Quiz': render_quiz_text(questions), 'questions': questions}
+    except Exception as e:
+        print(f"❌ Gemini API Error: {str(e)}")
+        return {"error": str(e)}
+
+
+def generate_more_quiz_questions(Paragraph, difficulty, existing_questions, count):
+    """
+    Generate up to `count` new validated questions for a text that already has some
+    """
+    try:
+        questions = _request_quiz_questions(Paragraph, _quiz_style(difficulty), count, existing_questions)
+        if not questions:
+            return {"error": "Could not generate any new quiz questions"}
+        return {'Your Quiz': render_quiz_text(questions), 'questions': questions}
     except Exception as e:
         print(f"❌ Gemini API Error: {str(e)}")
         return {"error": str(e)}
 
 
+def _request_quiz_questions(Paragraph, style, count, existing_questions):
+    """Ask Gemini for `count` more questions that don't repeat the existing ones"""
+    existing = "\n".join(f"- {q['question']}" for q in existing_questions) or "- (none)"
+    prompt = f"""
+Generate exactly {count} new multiple choice question(s) from the following text.
+{style}
+Do not repeat any of these existing questions:
+{existing}
+
+For every question give "question", exactly 4 "options" without letter prefixes,
+the 0-based "answer_index" of the correct option, a one-sentence "explanation",
+and a "source_quote" copied word for word from the text.
+
+Text to create questions from:
+{Paragraph}
+"""
+    try:
+        quiz_json = _generate_text('quiz_repair', prompt, QUIZ_GENERATION_CONFIG)
+    except Exception as e:
+        print(f"❌ Quiz repair failed: {str(e)}")
+        return []
+
+    replacements, _ = _parse_quiz_questions(quiz_json, Paragraph)
+    seen = {q['question'].lower() for q in existing_questions}
+    return [q for q in replacements if q['question'].lower() not in seen][:count]
+
+
+def _answer_prompt(question):
+    return f"Answer this question clearly:\n\n{question}"
+
 def ask_qustion(Qustions):
     try:
-        prompt = f"Answer this question clearly:\n\n{Qustions}"
-        responce = model.generate_content(prompt)
-        return{'Your answers':responce.text}
+        prompt = _answer_prompt(Qustions)
+        answer_text = _generate_text('answer', prompt)
+        return{'Your answers':answer_text}
     except Exception as e:
         return {"error": str(e)}
 
-def generate_story_content(topic, character, emotion, duration):
+def stream_sumary(text):
     """
-    Generate educational story content using Gemini AI
+    Yield the summary of text piece by piece as Gemini generates it
     """
-    try:
-        # Calculate approximate word count for target duration (150 words per minute speaking rate)
-        target_words = int((duration / 60) * 150)
-        
-        # Emotion-based story themes
-        emotion_themes = {
-            'happy': 'celebration, joy, and discovery',
-            'calm': 'peace, tranquility, and gentle learning',
-            'stressed': 'overcoming challenges and finding inner strength',
-            'tired': 'rest, renewal, and gentle encouragement',
-            'focused': 'determination, growth, and achievement',
-            'sad': 'hope, healing, and emotional support'
-        }
-        
-        theme = emotion_themes.get(emotion, 'adventure and learning')
-        
-        prompt = f"""
+    return _stream_text('summary', _summary_prompt(text))
+
+def stream_answer(question):
+    """
+    Yield the answer to question piece by piece as Gemini generates it
+    """
+    return _stream_text('answer', _answer_prompt(question))
+
+def _story_prompt(topic, character, emotion, duration):
+    # Calculate approximate word count for target duration (150 words per minute speaking rate)
+    target_words = int((duration / 60) * 150)
+    
+    # Emotion-based story themes
+    emotion_themes = {
+        'happy': 'celebration, joy, and discovery',
+        'calm': 'peace, tranquility, and gentle learning',
+        'stressed': 'overcoming challenges and finding inner strength',
+        'tired': 'rest, renewal, and gentle encouragement',
+        'focused': 'determination, growth, and achievement',
+        'sad': 'hope, healing, and emotional support'
+    }
+    
+    theme = emotion_themes.get(emotion, 'adventure and learning')
+    
+    return f"""
         Create an engaging, educational story about "{topic}" featuring {character['name']} who is {character['personality']}.
         
         Story Requirements:
@@ -116,14 +523,33 @@ def generate_story_content(topic, character, emotion, duration):
         Format the response as a complete story with natural dialogue and descriptive scenes.
         Make it feel magical and inspiring while teaching about {topic}.
         """
+
+def generate_story_title(topic, character, emotion):
+    """
+    Generate a short title for a story using Gemini AI
+    """
+    title_prompt = f"Create a short, engaging title for this story about {topic} featuring {character['name']}. Make it sound magical and educational. Choose one title only that relates to the {character['personality']} and the {emotion} chosen."
+    title_text = _generate_text('story_title', title_prompt)
+    return title_text.strip().replace('"', '')
+
+def start_story_title(topic, character, emotion):
+    """
+    Start generating a story title in the background; returns a Future.
+    The title prompt does not depend on the story text, so both can run at once.
+    """
+    return _side_requests.submit(generate_story_title, topic, character, emotion)
+
+def generate_story_content(topic, character, emotion, duration):
+    """
+    Generate educational story content using Gemini AI
+    """
+    try:
+        # Generate the title concurrently with the story body
+        title_future = start_story_title(topic, character, emotion)
         
-        response = model.generate_content(prompt)
-        story_content = response.text
-        
-        # Generate a title
-        title_prompt = f"Create a short, engaging title for this story about {topic} featuring {character['name']}. Make it sound magical and educational. Choose one title only that relates to the {character['personality']} and the {emotion} chosen."
-        title_response = model.generate_content(title_prompt)
-        title = title_response.text.strip().replace('"', '')
+        prompt = _story_prompt(topic, character, emotion, duration)
+        story_content = _generate_text('story', prompt)
+        title = title_future.result()
         
         return {
             'title': title,
@@ -137,6 +563,12 @@ def generate_story_content(topic, character, emotion, duration):
     except Exception as e:
         return {"error": str(e)}
 
+def stream_story_content(topic, character, emotion, duration):
+    """
+    Yield the story body piece by piece as Gemini generates it
+    """
+    return _stream_text('story', _story_prompt(topic, character, emotion, duration))
+
 
 def generate_memory_recap(study_data, time_range, custom_query=""):
     """
@@ -230,11 +662,12 @@ def generate_memory_recap(study_data, time_range, custom_query=""):
             - recommendations: [list of personalized recommendations]
             """
         
-        response = model.generate_content(prompt)
+        # Recaps depend on live user data, so they are never cached
+        recap_text = _generate_text('memory_recap', prompt)
         
         try:
             # Try to parse as JSON first
-            recap_data = json.loads(response.text)
+            recap_data = json.loads(recap_text)
             return recap_data
         except json.JSONDecodeError:
             # If JSON parsing fails, create structured response
@@ -342,11 +775,11 @@ def generate_study_plan_content(topic, difficulty, user_context=None):
         Make it engaging, practical, and achievable. Focus on building knowledge progressively.
         """
         
-        response = model.generate_content(prompt)
+        plan_text = _generate_text('study_plan', prompt)
         
         try:
             # Try to parse as JSON
-            plan_data = json.loads(response.text)
+            plan_data = json.loads(plan_text)
             return plan_data
         except json.JSONDecodeError:
             # If JSON parsing fails, create a structured fallback
@@ -0,0 +1,111 @@
+import os
+import time
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+from dotenv import load_dotenv
+
+load_dotenv()
+# Tesseract is most accurate around 300 DPI; phone photos are far above that
+TARGET_DPI = int(os.getenv('OCR_TARGET_DPI', '300'))
+# Photos carry no usable DPI, so assume the longest side spans an 11 inch page
+MAX_SIDE = int(os.getenv('OCR_MAX_SIDE', str(11 * TARGET_DPI)))
+# A pixel is ink when it is this much darker than the mean of its neighbourhood
+THRESHOLD_OFFSET = float(os.getenv('OCR_THRESHOLD_OFFSET', '0.15'))
+MAX_SKEW_DEGREES = float(os.getenv('OCR_MAX_SKEW_DEGREES', '5'))
+# Deskew angles are searched on a thumbnail of this size
+DESKEW_SAMPLE_SIDE = 1000
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _scale_factor(image):
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0] and dpi[0] > TARGET_DPI:
+        return TARGET_DPI / float(dpi[0])
+    return min(1.0, MAX_SIDE / float(max(image.size)))
+
+
+def adaptive_threshold(gray, offset=THRESHOLD_OFFSET):
+    """
+    Binarize a grayscale image against its local mean, which copes with the
+    uneven lighting of phone photos where one global threshold does not.
+    """
+    # Window of roughly one line of text at the target resolution
+    radius = max(7, min(gray.size) // 60)
+    local_mean = np.asarray(gray.filter(ImageFilter.BoxBlur(radius)), dtype=np.float32)
+    pixels = np.asarray(gray, dtype=np.float32)
+    ink = pixels < local_mean * (1 - offset)
+    return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+
+
+def _profile_score(ink_y, ink_x, angle):
+    # For small angles, rotating the page is close to shearing each ink pixel's row
+    rows = ink_y - ink_x * np.tan(np.radians(angle))
+    profile = np.bincount(np.round(rows - rows.min()).astype(np.int64))
+    # Text lines aligned with the rows give sharp peaks and gaps in the profile
+    return float(np.sum(np.diff(profile) ** 2))
+
+
+def estimate_skew(binary, max_degrees=MAX_SKEW_DEGREES):
+    """Rotation in degrees that straightens the text, found by maximizing the projection profile"""
+    sample = binary.copy()
+    sample.thumbnail((DESKEW_SAMPLE_SIDE, DESKEW_SAMPLE_SIDE), Image.NEAREST)
+    ink_y, ink_x = np.nonzero(np.asarray(sample) < 128)
+    if ink_y.size == 0:
+        return 0.0
+
+    coarse = np.arange(-max_degrees, max_degrees + 0.5, 1.0)
+    best = max(coarse, key=lambda angle: _profile_score(ink_y, ink_x, angle))
+    fine = np.arange(best - 1.0, best + 1.0 + 0.1, 0.1)
+    return round(float(max(fine, key=lambda angle: _profile_score(ink_y, ink_x, angle))), 2)
+
+
+def preprocess_for_ocr(image):
+    """
+    Downscale, grayscale, binarize and deskew an image for Tesseract.
+    Returns (processed PIL image, info) where info has per-stage timings.
+    """
+    timings = {}
+    original_size = image.size
+
+    started = time.perf_counter()
+    scale = _scale_factor(image)
+    target_side = max(1, round(max(original_size) * scale))
+    if scale < 1.0:
+        # Large JPEGs can decode straight at a reduced size, skipping most of the decode work
+        image.draft('RGB', (round(image.width * scale), round(image.height * scale)))
+    # Phone photos are often stored sideways with an EXIF orientation tag
+    image = ImageOps.exif_transpose(image)
+    timings['decode_ms'] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    gray = image.convert('L')
+    timings['grayscale_ms'] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    ratio = target_side / float(max(gray.size))
+    # A few percent off is not worth a full resample
+    if ratio < 0.9:
+        size = (max(1, round(gray.width * ratio)), max(1, round(gray.height * ratio)))
+        gray = gray.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    timings['downscale_ms'] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    binary = adaptive_threshold(gray)
+    timings['threshold_ms'] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    skew = estimate_skew(binary)
+    if abs(skew) >= 0.2:
+        binary = binary.rotate(skew, resample=Image.NEAREST, expand=True, fillcolor=255)
+    timings['deskew_ms'] = _elapsed_ms(started)
+
+    return binary, {
+        'original_size': list(original_size),
+        'size': list(binary.size),
+        'scale': round(scale, 3),
+        'skew_degrees': skew,
+        'timings_ms': timings
+    }
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import random
+import hashlib
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_STUB_WORDS = (
+    'learning concept energy cell theory example process system student model '
+    'function structure equation history reaction memory practice result method '
+    'pattern evidence force language number value network growth balance idea'
+).split()
+
+
+class LLMResponse:
+    """Minimal response object with the attributes our callers read from Gemini responses"""
+
+    def __init__(self, text, total_tokens=None):
+        self.text = text
+        self.usage_metadata = _Usage(total_tokens) if total_tokens is not None else None
+
+
+class _Usage:
+    def __init__(self, total_token_count):
+        self.total_token_count = total_token_count
+
+
+class LLMBackend(ABC):
+    """
+    Interface every text generation backend implements. generate_content
+    returns an object with .text, or an iterator of such objects when stream=True.
+    """
+    name = 'base'
+    model_name = None
+
+    @abstractmethod
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        """Generate a response for prompt"""
+
+
+class GeminiBackend(LLMBackend):
+    name = 'gemini'
+
+    def __init__(self, model_name, api_key):
+        if not api_key:
+            raise EnvironmentError("GEMINI_API_KEY is missing.")
+        # Imported here so other backends work without the Gemini SDK installed
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        return self._model.generate_content(prompt, generation_config=generation_config, stream=stream)
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline backend for load tests: the same prompt always produces the same
+    response, and latency is simulated as a fixed time to first token plus a
+    token generation rate. JSON-mode calls with a response_schema get a
+    document that matches the schema; *_quote fields quote the prompt.
+    """
+    name = 'stub'
+    model_name = 'stub'
+
+    def __init__(self, first_token_latency=0.3, tokens_per_second=80, response_tokens=200, list_items=10):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.list_items = list_items
+
+    def _rng(self, prompt):
+        seed = hashlib.sha256(str(prompt).encode('utf-8')).hexdigest()
+        return random.Random(seed)
+
+    def _sentence(self, rng, words):
+        return ' '.join(rng.choice(_STUB_WORDS) for _ in range(words)).capitalize() + '.'
+
+    def _quote(self, prompt, rng):
+        """A few consecutive words from the end of the prompt, where the source text goes"""
+        words = str(prompt).rstrip().splitlines()[-1].split() if str(prompt).strip() else []
+        if not words:
+            return self._sentence(rng, 6)
+        start = rng.randrange(max(1, len(words) - 5))
+        return ' '.join(words[start:start + 6])
+
+    def _from_schema(self, schema, rng, label='value', index=0, prompt=''):
+        schema_type = str(schema.get('type', 'STRING')).upper()
+        if schema_type == 'OBJECT':
+            return {
+                key: self._from_schema(value, rng, key, index, prompt)
+                for key, value in schema.get('properties', {}).items()
+            }
+        if schema_type == 'ARRAY':
+            items = schema.get('items', {})
+            # Lists of records get a full page of entries; scalar lists stay small (e.g. 4 quiz options)
+            count = self.list_items if str(items.get('type', '')).upper() == 'OBJECT' else 4
+            return [self._from_schema(items, rng, label, i, prompt) for i in range(count)]
+        if schema_type == 'INTEGER':
+            return rng.randint(0, 3)
+        if schema_type == 'NUMBER':
+            return round(rng.random(), 3)
+        if schema_type == 'BOOLEAN':
+            return rng.random() < 0.5
+        if label.endswith('_quote'):
+            # Quotes are checked against the source text, so copy them from the prompt
+            return self._quote(prompt, rng)
+        return f"{label} {index + 1}: {self._sentence(rng, 6)}"
+
+    def _respond(self, prompt, generation_config):
+        rng = self._rng(prompt)
+        schema = (generation_config or {}).get('response_schema')
+        if schema:
+            return json.dumps(self._from_schema(schema, rng, prompt=prompt))
+        return ' '.join(self._sentence(rng, 10) for _ in range(max(1, self.response_tokens // 10)))
+
+    def _generation_time(self, text):
+        return len(text.split()) / self.tokens_per_second if self.tokens_per_second else 0
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        text = self._respond(prompt, generation_config)
+        total_tokens = len(str(prompt).split()) + len(text.split())
+        if stream:
+            return self._stream(text, total_tokens)
+        time.sleep(self.first_token_latency + self._generation_time(text))
+        return LLMResponse(text, total_tokens)
+
+    def _stream(self, text, total_tokens):
+        time.sleep(self.first_token_latency)
+        words = text.split(' ')
+        for start in range(0, len(words), 8):
+            piece = ' '.join(words[start:start + 8])
+            if start + 8 < len(words):
+                piece += ' '
+            time.sleep(self._generation_time(piece))
+            yield LLMResponse(piece)
+        yield LLMResponse('', total_tokens)
+
+
+def get_backend():
+    """Backend selected by LLM_BACKEND (gemini by default, or stub)"""
+    backend = os.getenv('LLM_BACKEND', 'gemini').lower()
+    if backend == 'stub':
+        print("🧪 Using stub LLM backend (deterministic, offline)")
+        return StubBackend(
+            first_token_latency=float(os.getenv('STUB_LATENCY_MS', '300')) / 1000,
+            tokens_per_second=float(os.getenv('STUB_TOKENS_PER_SECOND', '80')),
+            response_tokens=int(os.getenv('STUB_RESPONSE_TOKENS', '200'))
+        )
+    if backend == 'gemini':
+        return GeminiBackend(os.getenv('GEMINI_MODEL', 'gemini-1.5-flash-latest'), os.getenv('GEMINI_API_KEY'))
+    raise EnvironmentError(f"Unknown LLM_BACKEND '{backend}', expected 'gemini' or 'stub'.")
@@ -0,0 +1,194 @@
+import os
+import time
+import platform
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from services.image_preprocessing import preprocess_for_ocr
+
+load_dotenv()
+# Core budget for OCR: how many images are recognised at once
+OCR_MAX_WORKERS = int(os.getenv('OCR_MAX_WORKERS', str(os.cpu_count() or 1)))
+OCR_LANG = os.getenv('OCR_LANG', 'eng')
+# Downscale, binarize and deskew before recognition (OCR_PREPROCESS=0 to disable)
+OCR_PREPROCESS = os.getenv('OCR_PREPROCESS', '1') != '0'
+
+# Tesseract's own OpenMP threading would multiply with the pool; one thread per image
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+WINDOWS_TESSERACT_PATHS = [
+    r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+    r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+    r'C:\Users\{}\AppData\Local\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', '')),
+    r'C:\tesseract\tesseract.exe'
+]
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {'images': 0, 'failures': 0, 'total_ms': 0.0}
+_executor = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS, thread_name_prefix='ocr')
+
+
+def _detect_tesseract():
+    """
+    Find an OCR engine once per process. tesserocr (optional) keeps Tesseract
+    loaded in-process; otherwise pytesseract runs the tesseract binary.
+    Returns a status dict; 'reason' is set when OCR is unavailable.
+    """
+    try:
+        import tesserocr
+        # Without trained data for OCR_LANG every worker would fail, so fall back instead
+        if OCR_LANG in tesserocr.get_languages()[1]:
+            version = tesserocr.tesseract_version().splitlines()[0]
+            print(f"✅ Using tesserocr ({version})")
+            return {'available': True, 'engine': 'tesserocr', 'version': version}
+    except Exception:
+        pass
+
+    try:
+        import pytesseract
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        return {
+            'available': False,
+            'reason': 'missing_dependencies',
+            'error': 'OCR dependencies not installed',
+            'details': 'Please install: pip install pytesseract Pillow'
+        }
+
+    if platform.system() == 'Windows':
+        found = next((path for path in WINDOWS_TESSERACT_PATHS if os.path.exists(path)), None)
+        if found is None:
+            return {
+                'available': False,
+                'reason': 'not_found',
+                'error': 'Tesseract OCR not found',
+                'details': f'Searched paths: {WINDOWS_TESSERACT_PATHS}'
+            }
+        pytesseract.pytesseract.tesseract_cmd = found
+        print(f"✅ Found Tesseract at: {found}")
+
+    try:
+        version = str(pytesseract.get_tesseract_version())
+    except Exception as e:
+        return {
+            'available': False,
+            'reason': 'not_accessible',
+            'error': 'Tesseract OCR not accessible',
+            'details': str(e)
+        }
+    print(f"✅ Tesseract version: {version}")
+    return {'available': True, 'engine': 'pytesseract', 'version': version}
+
+
+OCR_STATUS = _detect_tesseract()
+
+
+def _tesserocr_api():
+    """This worker thread's Tesseract instance, created on first use and kept warm"""
+    api = getattr(_local, 'api', None)
+    if api is None:
+        import tesserocr
+        api = tesserocr.PyTessBaseAPI(lang=OCR_LANG)
+        _local.api = api
+    return api
+
+
+def _open_image(source):
+    from PIL import Image
+    if isinstance(source, Image.Image):
+        return source
+    if callable(source):
+        # Loader that renders the image on the worker, e.g. a rasterized PDF page
+        return source()
+    if isinstance(source, tuple):
+        # (path, frame): one page of a multi-page file, opened separately by each worker
+        path, frame = source
+        image = Image.open(path)
+        image.seek(frame)
+        return image
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = BytesIO(source)
+    # Left unloaded so preprocessing can decode large JPEGs at reduced size
+    return Image.open(source)
+
+
+def split_pages(upload):
+    """
+    OCR sources for every page of an uploaded image: the upload itself, or
+    (path, frame) pairs for multi-page files such as scanned TIFFs, so pages
+    can be recognised in parallel without copying them out of the file.
+    """
+    from PIL import Image
+    upload.seek(0)
+    with Image.open(upload) as image:
+        frames = getattr(image, 'n_frames', 1)
+    upload.seek(0)
+    if frames == 1:
+        return [upload]
+    path = upload.path
+    return [(path, frame) for frame in range(frames)]
+
+
+def _recognize(source):
+    """Runs on an OCR worker: returns {'text', 'ms'} plus 'preprocess' details when enabled"""
+    started = time.perf_counter()
+    preprocess = None
+    opened = None
+    try:
+        image = opened = _open_image(source)
+        if OCR_PREPROCESS:
+            image, preprocess = preprocess_for_ocr(image)
+        if OCR_STATUS['engine'] == 'tesserocr':
+            api = _tesserocr_api()
+            api.SetImage(image)
+            text = api.GetUTF8Text()
+        else:
+            import pytesseract
+            text = pytesseract.image_to_string(image, lang=OCR_LANG)
+    except Exception:
+        with _stats_lock:
+            _stats['failures'] += 1
+        raise
+    finally:
+        # Images opened or rendered here hold their own resources; release them before the upload is deleted
+        if (isinstance(source, tuple) or callable(source)) and opened is not None:
+            opened.close()
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    with _stats_lock:
+        _stats['images'] += 1
+        _stats['total_ms'] += elapsed_ms
+    result = {'text': text, 'ms': elapsed_ms}
+    if preprocess:
+        result['preprocess'] = preprocess
+    return result
+
+
+def submit_ocr(source):
+    """
+    Queue one image for OCR and return a Future of {'text', 'ms'}. source is
+    a PIL image, raw bytes, a readable file object (e.g. a spooled upload),
+    a (path, frame) pair from split_pages, or a callable returning a PIL image.
+    """
+    if not OCR_STATUS['available']:
+        raise RuntimeError(OCR_STATUS['error'])
+    return _executor.submit(_recognize, source)
+
+
+def ocr_image(source):
+    """OCR one image on the worker pool and wait for the result"""
+    return submit_ocr(source).result()
+
+
+def get_ocr_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['avg_ms'] = round(stats.pop('total_ms') / stats['images'], 2) if stats['images'] else None
+    stats.update({
+        'engine': OCR_STATUS.get('engine'),
+        'available': OCR_STATUS['available'],
+        'workers': OCR_MAX_WORKERS
+    })
+    return stats
@@ -0,0 +1,175 @@
+import os
+import time
+import threading
+import multiprocessing
+from io import BytesIO
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import PyPDF2
+from dotenv import load_dotenv
+
+load_dotenv()
+PDF_MAX_WORKERS = int(os.getenv('PDF_MAX_WORKERS', str(os.cpu_count() or 1)))
+# Each task parses a run of pages so the per-task PDF open cost is amortized
+PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', '16'))
+# Below this, process start-up and IPC cost more than they save
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '24'))
+# Pages with no text layer (scans) are rasterized and OCR'd; PDF_OCR_FALLBACK=0 disables it
+PDF_OCR_FALLBACK = os.getenv('PDF_OCR_FALLBACK', '1') != '0'
+PDF_OCR_MAX_PAGES = int(os.getenv('PDF_OCR_MAX_PAGES', '200'))
+PDF_RENDER_DPI = int(os.getenv('PDF_RENDER_DPI', '300'))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: forking a multi-threaded web worker can deadlock the child
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_MAX_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _extract_page_range(path, start, end):
+    """Runs in a worker process: extract pages [start, end) as (index, text, milliseconds)"""
+    # PdfReader(path) reads the whole file into memory; a file object is read lazily
+    with open(path, 'rb') as f:
+        return _extract_pages(PyPDF2.PdfReader(f), start, end)
+
+
+def _extract_pages(reader, start, end):
+    results = []
+    for index in range(start, end):
+        started = time.perf_counter()
+        text = reader.pages[index].extract_text() or ''
+        results.append((index, text, round((time.perf_counter() - started) * 1000, 2)))
+    return results
+
+
+def _render_page(path, index):
+    """
+    Runs in a worker process: image of one PDF page for OCR. Renders with
+    pypdfium2 when it is installed; otherwise uses the largest image embedded
+    in the page, which for scanned documents is the scan itself.
+    """
+    try:
+        import pypdfium2
+    except ImportError:
+        pypdfium2 = None
+
+    if pypdfium2 is not None:
+        # Each worker process renders one page at a time, which keeps PDFium single-threaded
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            return pdf[index].render(scale=PDF_RENDER_DPI / 72).to_pil()
+        finally:
+            pdf.close()
+
+    from PIL import Image
+    with open(path, 'rb') as f:
+        images = PyPDF2.PdfReader(f).pages[index].images
+        if not images:
+            raise ValueError(f"page {index + 1} has no text layer or embedded image")
+        largest = max(images, key=lambda image: len(image.data))
+        image = Image.open(BytesIO(largest.data))
+        image.load()
+        return image
+
+
+def rasterize_page(path, index):
+    """
+    Image of one PDF page for OCR, rendered on the extraction process pool so
+    pages of every request render in parallel. Raises ValueError if the page
+    has neither a renderer nor an embedded image.
+    """
+    return _get_pool().submit(_render_page, path, index).result()
+
+
+def _ocr_blank_pages(path, pages, timings, methods):
+    """
+    OCR every page without a text layer concurrently and merge the text back in place.
+    Returns (recognised, skipped): skipped counts pages whose OCR raised. Without an
+    OCR engine nothing is attempted, so nothing counts as skipped.
+    """
+    # Imported here so the extraction worker processes never load the OCR engine
+    from services.ocr_service import OCR_STATUS, submit_ocr
+    blank = [index for index, text in enumerate(pages) if not text.strip()]
+    if not blank or not PDF_OCR_FALLBACK:
+        return 0, 0
+
+    blank = blank[:PDF_OCR_MAX_PAGES]
+    if not OCR_STATUS['available']:
+        return 0, 0
+
+    print(f"🖨️ OCR fallback for {len(blank)} scanned page(s)")
+    futures = [(index, submit_ocr(partial(rasterize_page, path, index))) for index in blank]
+    recognised = 0
+    for index, future in futures:
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"⚠️ OCR failed for page {index + 1}: {str(e)}")
+            continue
+        pages[index] = result['text']
+        timings[index] = round(timings[index] + result['ms'], 2)
+        methods[index] = 'ocr'
+        recognised += 1
+    return recognised, len(blank) - recognised
+
+
+def extract_pdf_pages(path):
+    """
+    Extract the text layer of every page of the PDF at path, in page order.
+    Long documents are split into page ranges and extracted on a process pool,
+    so extraction scales with cores instead of holding one request thread.
+    Pages without a text layer are then OCR'd in parallel; page_methods
+    records 'text_layer', 'ocr' or 'none' (no text found) for each page, and
+    ocr_skipped counts scanned pages whose OCR failed this time.
+    Returns {'pages', 'page_timings_ms', 'page_methods', 'page_count', 'ocr_pages',
+    'ocr_skipped', 'workers', 'total_ms'}.
+    """
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        serial = page_count < PARALLEL_MIN_PAGES or PDF_MAX_WORKERS <= 1
+        if serial:
+            results = _extract_pages(reader, 0, page_count)
+            workers = 1
+
+    if not serial:
+        # Workers get their page ranges from the count taken here and open the file themselves
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_page_range, path, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+        results = [page for future in futures for page in future.result()]
+        workers = min(PDF_MAX_WORKERS, len(futures))
+
+    pages = [''] * page_count
+    timings = [0.0] * page_count
+    for index, text, elapsed_ms in results:
+        pages[index] = text
+        timings[index] = elapsed_ms
+
+    methods = ['text_layer' if text.strip() else 'none' for text in pages]
+    ocr_pages, ocr_skipped = _ocr_blank_pages(path, pages, timings, methods)
+
+    total_ms = round((time.perf_counter() - started) * 1000, 2)
+    print(f"📄 Extracted {page_count} pages ({ocr_pages} by OCR) with {workers} worker(s) in {total_ms} ms")
+    return {
+        'pages': pages,
+        'page_timings_ms': timings,
+        'page_methods': methods,
+        'page_count': page_count,
+        'ocr_pages': ocr_pages,
+        'ocr_skipped': ocr_skipped,
+        'workers': workers,
+        'total_ms': total_ms
+    }
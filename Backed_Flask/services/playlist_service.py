@@ -0,0 +1,113 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from services.youtube_service import resolve_playlist, get_videos_info, get_video_segments, join_segments, VIDEO_NOT_FOUND
+from services.transcript_cleanup import clean_segments
+from services.summarization_service import summarize_long_text
+
+load_dotenv()
+PLAYLIST_MAX_VIDEOS = int(os.getenv('YOUTUBE_PLAYLIST_MAX_VIDEOS', '100'))
+# Videos in flight at once across all requests; transcripts are scraped, so keep this modest
+PLAYLIST_WORKERS = int(os.getenv('YOUTUBE_PLAYLIST_WORKERS', '4'))
+
+_executor = ThreadPoolExecutor(max_workers=PLAYLIST_WORKERS, thread_name_prefix='playlist')
+
+
+def _summarize_video(index, video_id, info):
+    """Transcript and summary for one playlist video; never raises"""
+    title, duration, info_error, is_music = info
+    video = {
+        'index': index,
+        'video_id': video_id,
+        'title': title or 'Unknown Title',
+        'duration': duration
+    }
+
+    if info_error == VIDEO_NOT_FOUND:
+        video.update({'status': 'skipped', 'error': info_error})
+        return video
+    if is_music:
+        video.update({'status': 'skipped', 'error': 'Music video'})
+        return video
+
+    try:
+        segments, transcript_error = get_video_segments(video_id)
+        if transcript_error:
+            video.update({'status': 'skipped', 'error': transcript_error})
+            return video
+
+        segments, cleanup = clean_segments(segments)
+        video['tokens_saved'] = cleanup['tokens_saved']
+        result = summarize_long_text(join_segments(segments))
+        if 'error' in result:
+            video.update({'status': 'failed', 'error': result['error']})
+        else:
+            video.update({'status': 'summarized', 'summary': result['Summary']})
+    except Exception as e:
+        video.update({'status': 'failed', 'error': str(e)})
+    return video
+
+
+def summarize_playlist(url, max_videos=PLAYLIST_MAX_VIDEOS):
+    """
+    Summarize every video of a playlist or channel, then the course as a whole.
+    Yields (event, data) pairs as work progresses:
+      'playlist' once the videos are known,
+      'video' as each video finishes (in completion order, with its index),
+      'done' with the per-video summaries in playlist order and the course summary,
+      or 'error' if the playlist cannot be read.
+    """
+    started = time.perf_counter()
+    playlist, error = resolve_playlist(url, max_videos)
+    if error:
+        yield 'error', {'error': error}
+        return
+
+    video_ids = playlist['video_ids']
+    if not video_ids:
+        yield 'error', {'error': 'This playlist has no videos'}
+        return
+
+    # One videos().list call per 50 videos instead of one per video
+    infos = get_videos_info(video_ids)
+    yield 'playlist', {
+        'playlist_id': playlist['playlist_id'],
+        'title': playlist['title'],
+        'video_count': len(video_ids)
+    }
+
+    futures = [
+        _executor.submit(_summarize_video, index, video_id, infos[video_id])
+        for index, video_id in enumerate(video_ids)
+    ]
+    videos = [None] * len(video_ids)
+    for completed, future in enumerate(as_completed(futures), 1):
+        video = future.result()
+        videos[video['index']] = video
+        print(f"🎬 Playlist {playlist['playlist_id']}: {completed}/{len(video_ids)} ({video['status']})")
+        yield 'video', {'completed': completed, 'total': len(video_ids), 'video': video}
+
+    summarized = [video for video in videos if video['status'] == 'summarized']
+    course = {'playlist_id': playlist['playlist_id'], 'title': playlist['title']}
+    if summarized:
+        # Each video is one section, so the map-reduce tree handles courses of any length
+        sections = [f"Video {video['index'] + 1}: {video['title']}\n{video['summary']}" for video in summarized]
+        rollup = summarize_long_text(sections)
+        if 'error' in rollup:
+            course['summary_error'] = rollup['error']
+        else:
+            course['summary'] = rollup['Summary']
+
+    yield 'done', {
+        'success': bool(summarized),
+        'course': course,
+        'videos': videos,
+        'stats': {
+            'videos': len(videos),
+            'summarized': len(summarized),
+            'skipped': sum(1 for video in videos if video['status'] == 'skipped'),
+            'failed': sum(1 for video in videos if video['status'] == 'failed'),
+            'total_seconds': round(time.perf_counter() - started, 2)
+        }
+    }
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+from dotenv import load_dotenv
+from services.cache_service import CACHE_DIR, make_cache_key, normalize_text
+from services.gemini_service import genrate_Quiz, generate_more_quiz_questions, render_quiz_text
+
+load_dotenv()
+QUESTION_BANK_PATH = os.path.join(CACHE_DIR, 'question_bank.sqlite3')
+QUIZ_SIZE = int(os.getenv('QUIZ_SIZE', '10'))
+MAX_BANK_QUESTIONS = int(os.getenv('QUIZ_BANK_MAX_QUESTIONS', '200'))
+# Banked questions and served-question history are dropped after this long
+BANK_TTL = float(os.getenv('QUIZ_BANK_TTL_DAYS', '30')) * 24 * 3600
+SERVED_TTL = float(os.getenv('QUIZ_SERVED_TTL_DAYS', '30')) * 24 * 3600
+# Shared in-memory database used when the cache directory cannot be written
+MEMORY_DB_URI = 'file:mentora_question_bank?mode=memory&cache=shared'
+
+# Anonymous callers share one history, so they are just served random questions
+ANONYMOUS = ''
+
+
+def document_hash(text):
+    """Content hash of a quiz source text, insensitive to whitespace differences"""
+    return make_cache_key(normalize_text(text))
+
+
+def question_id(question):
+    return make_cache_key(question['question'].lower(), [option.lower() for option in question['options']])[:16]
+
+
+class QuestionBank:
+    """
+    Every generated question, keyed by (document hash, difficulty), plus a
+    record of which questions each user has already been served. Both expire
+    after their TTLs; without a writable cache directory the bank is kept in
+    memory for the life of the process.
+    """
+
+    def __init__(self, db_path=QUESTION_BANK_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._writes_since_prune = 0
+        self._memory_conn = None
+        try:
+            self._init_db()
+        except Exception as e:
+            # Like TieredCache: keep working without persistence rather than fail at startup
+            print(f"⚠️ Question bank running memory-only, SQLite unavailable: {e}")
+            self.db_path = None
+            self._local = threading.local()
+            # An in-memory database lives only while a connection to it is open
+            self._memory_conn = sqlite3.connect(MEMORY_DB_URI, uri=True, check_same_thread=False)
+            self._init_db()
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bank_questions (
+                doc_hash TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                question_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (doc_hash, difficulty, question_id)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS served_questions (
+                user_key TEXT NOT NULL,
+                doc_hash TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                question_id TEXT NOT NULL,
+                served_at REAL NOT NULL,
+                PRIMARY KEY (user_key, doc_hash, difficulty, question_id)
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_bank_created ON bank_questions (created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_served_at ON served_questions (served_at)')
+        conn.commit()
+        self.prune()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.db_path is None:
+                conn = sqlite3.connect(MEMORY_DB_URI, uri=True, timeout=5)
+            else:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                conn = sqlite3.connect(self.db_path, timeout=5)
+                conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def prune(self, now=None):
+        """Drop banked questions and served history older than their TTLs"""
+        now = now or time.time()
+        conn = self._connect()
+        conn.execute('DELETE FROM bank_questions WHERE created_at <= ?', (now - BANK_TTL,))
+        conn.execute('DELETE FROM served_questions WHERE served_at <= ?', (now - SERVED_TTL,))
+        conn.commit()
+
+    def _maybe_prune(self, now):
+        # Pruning scans the tables, so only do it every so often
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= 50:
+            self._writes_since_prune = 0
+            self.prune(now)
+
+    def add_questions(self, doc_hash, difficulty, questions):
+        """Store questions, ignoring ones already in the bank; returns how many were new"""
+        conn = self._connect()
+        now = time.time()
+        cursor = conn.executemany(
+            'INSERT OR IGNORE INTO bank_questions (doc_hash, difficulty, question_id, data, created_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(doc_hash, difficulty, question_id(q), json.dumps(q, ensure_ascii=False), now) for q in questions]
+        )
+        conn.commit()
+        self._maybe_prune(now)
+        return cursor.rowcount
+
+    def count(self, doc_hash, difficulty):
+        row = self._connect().execute(
+            'SELECT COUNT(*) FROM bank_questions WHERE doc_hash = ? AND difficulty = ?',
+            (doc_hash, difficulty)
+        ).fetchone()
+        return row[0]
+
+    def unseen(self, doc_hash, difficulty, user_key):
+        """All questions this user has not been served yet, as (question_id, question) pairs"""
+        rows = self._connect().execute("""
+            SELECT q.question_id, q.data FROM bank_questions q
+            WHERE q.doc_hash = ? AND q.difficulty = ? AND NOT EXISTS (
+                SELECT 1 FROM served_questions s
+                WHERE s.user_key = ? AND s.doc_hash = q.doc_hash
+                  AND s.difficulty = q.difficulty AND s.question_id = q.question_id
+            )
+        """, (doc_hash, difficulty, user_key)).fetchall()
+        return [(qid, json.loads(data)) for qid, data in rows]
+
+    def mark_served(self, doc_hash, difficulty, user_key, question_ids):
+        conn = self._connect()
+        now = time.time()
+        conn.executemany(
+            'INSERT OR REPLACE INTO served_questions (user_key, doc_hash, difficulty, question_id, served_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(user_key, doc_hash, difficulty, qid, now) for qid in question_ids]
+        )
+        conn.commit()
+        self._maybe_prune(now)
+
+    def reset_served(self, doc_hash, difficulty, user_key):
+        conn = self._connect()
+        conn.execute(
+            'DELETE FROM served_questions WHERE user_key = ? AND doc_hash = ? AND difficulty = ?',
+            (user_key, doc_hash, difficulty)
+        )
+        conn.commit()
+
+    def all_questions(self, doc_hash, difficulty):
+        rows = self._connect().execute(
+            'SELECT data FROM bank_questions WHERE doc_hash = ? AND difficulty = ?',
+            (doc_hash, difficulty)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+
+question_bank = QuestionBank()
+
+
+def get_quiz(text, difficulty="Beginner", user_id=None):
+    """
+    Serve a quiz from the question bank, calling Gemini only when this user
+    has fewer than QUIZ_SIZE unseen questions left for the document.
+    Returns the same shape as genrate_Quiz plus a 'source' of 'bank' or 'generated'.
+    """
+    try:
+        return _get_banked_quiz(text, difficulty, user_id)
+    except sqlite3.Error as e:
+        # A broken bank costs the saving, not the quiz
+        print(f"⚠️ Question bank unavailable, generating directly: {e}")
+        result = genrate_Quiz(text, difficulty)
+        if 'error' not in result:
+            result['source'] = 'generated'
+        return result
+
+
+def _get_banked_quiz(text, difficulty, user_id):
+    doc_hash = document_hash(text)
+    level = difficulty.lower()
+    user_key = str(user_id) if user_id else ANONYMOUS
+
+    unseen = question_bank.unseen(doc_hash, level, user_key)
+    source = 'bank'
+
+    if len(unseen) < QUIZ_SIZE:
+        bank_size = question_bank.count(doc_hash, level)
+        if bank_size >= MAX_BANK_QUESTIONS:
+            # The bank for this document is full; let the user cycle through it again
+            question_bank.reset_served(doc_hash, level, user_key)
+            unseen = question_bank.unseen(doc_hash, level, user_key)
+        else:
+            print(f"📚 Question bank low ({len(unseen)} unseen of {bank_size}), generating more")
+            if bank_size == 0:
+                result = genrate_Quiz(text, difficulty)
+            else:
+                result = generate_more_quiz_questions(
+                    text, difficulty, question_bank.all_questions(doc_hash, level), QUIZ_SIZE
+                )
+
+            if 'error' in result:
+                if not unseen:
+                    return result
+                print(f"⚠️ Serving {len(unseen)} banked questions, generation failed: {result['error']}")
+            else:
+                question_bank.add_questions(doc_hash, level, result['questions'])
+                unseen = question_bank.unseen(doc_hash, level, user_key)
+                source = 'generated'
+
+    picked = random.sample(unseen, min(QUIZ_SIZE, len(unseen)))
+    if user_key != ANONYMOUS:
+        question_bank.mark_served(doc_hash, level, user_key, [qid for qid, _ in picked])
+
+    questions = [question for _, question in picked]
+    return {'Your Quiz': render_quiz_text(questions), 'questions': questions, 'source': source}
@@ -0,0 +1,188 @@
+import time
+import threading
+from collections import deque
+
+# Every limiter created in this process, so stats can be reported in one place
+_limiters = {}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call could not get a slot before its queue deadline"""
+    pass
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (about 4 characters per token for English)"""
+    return len(str(text)) // 4 + 1
+
+
+class TokenBucket:
+    """Classic token bucket; the level may go negative to record debt from under-estimates"""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self._last
+        self._last = now
+        self.level = min(self.capacity, self.level + elapsed * self.refill_per_second)
+
+    def time_until(self, amount, now):
+        """Seconds until amount can be taken (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0
+        return (amount - self.level) / self.refill_per_second
+
+    def consume(self, amount):
+        self.level -= amount
+
+
+class RateLimitedClient:
+    """
+    Wraps a model object so every generate_content call first gets a
+    concurrency slot plus request and token budget from per-minute buckets.
+    Callers that arrive when no budget is left queue in arrival order until
+    their deadline, then fail with RateLimitExceeded instead of hitting the
+    upstream's 429s.
+    """
+
+    def __init__(self, model, name, max_concurrency=8, requests_per_minute=60,
+                 tokens_per_minute=1_000_000, queue_timeout=30, output_token_estimate=1000):
+        self._model = model
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.output_token_estimate = output_token_estimate
+
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiters = deque()
+        self._waits = deque(maxlen=500)
+        self._counters = {'admitted': 0, 'rejected': 0}
+        _limiters[name] = self
+
+    def estimate_cost(self, prompt):
+        """Token budget reserved for one call: the prompt plus a typical response"""
+        return estimate_tokens(prompt) + self.output_token_estimate
+
+    def try_acquire(self, tokens):
+        """
+        Take a slot only if one is free right now and nobody is queued for it;
+        returns False instead of waiting. Used for optional extra calls such
+        as hedges, which must never delay or jump ahead of queued callers.
+        """
+        with self._cond:
+            if self._waiters or self._active >= self.max_concurrency:
+                return False
+            now = time.monotonic()
+            if self._requests.time_until(1, now) or self._tokens.time_until(tokens, now):
+                return False
+            self._requests.consume(1)
+            self._tokens.consume(tokens)
+            self._active += 1
+            self._counters['admitted'] += 1
+            return True
+
+    def acquire(self, tokens):
+        """Wait in line for a slot and budget; raises RateLimitExceeded after queue_timeout"""
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        ticket = object()
+
+        with self._cond:
+            # First come, first served: only the caller at the head of the line may take budget
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._waiters[0] is ticket and self._active < self.max_concurrency:
+                        wait = max(self._requests.time_until(1, now), self._tokens.time_until(tokens, now))
+                        if wait == 0:
+                            self._requests.consume(1)
+                            self._tokens.consume(tokens)
+                            self._active += 1
+                            self._counters['admitted'] += 1
+                            break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._counters['rejected'] += 1
+                        raise RateLimitExceeded(
+                            f"Too many AI requests right now; gave up after waiting {self.queue_timeout}s. Please try again shortly."
+                        )
+                    # Wake up when budget refills, a slot frees up, the line moves, or the deadline passes
+                    self._cond.wait(min(wait, remaining) if wait else remaining)
+            finally:
+                self._waiters.remove(ticket)
+                # Whoever is now at the head may be able to go straight away
+                self._cond.notify_all()
+                self._waits.append(time.monotonic() - started)
+
+    def release(self, estimated_tokens, response=None):
+        with self._cond:
+            self._active -= 1
+            # Settle the token bucket against what the call really used, when Gemini reports it
+            usage = getattr(response, 'usage_metadata', None)
+            actual_tokens = getattr(usage, 'total_token_count', None)
+            if actual_tokens:
+                self._tokens.consume(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def generate_content(self, prompt, **kwargs):
+        if kwargs.get('stream'):
+            return self._generate_stream(prompt, **kwargs)
+
+        tokens = self.estimate_cost(prompt)
+        self.acquire(tokens)
+        response = None
+        try:
+            response = self._model.generate_content(prompt, **kwargs)
+            return response
+        finally:
+            self.release(tokens, response)
+
+    def _generate_stream(self, prompt, **kwargs):
+        # The slot is held until the stream is fully consumed or closed
+        tokens = self.estimate_cost(prompt)
+        self.acquire(tokens)
+        chunk = None
+        try:
+            for chunk in self._model.generate_content(prompt, **kwargs):
+                yield chunk
+        finally:
+            self.release(tokens, chunk)
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._waits)
+            stats = {
+                'active': self._active,
+                'queued': len(self._waiters),
+                'max_concurrency': self.max_concurrency,
+                'requests_available': round(self._requests.level, 2),
+                'tokens_available': int(self._tokens.level),
+                **self._counters
+            }
+        stats.update({
+            'avg_wait_ms': round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            'p95_wait_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+            'max_wait_ms': round(waits[-1] * 1000, 1) if waits else 0.0
+        })
+        return stats
+
+    def __getattr__(self, attr):
+        # Anything else (count_tokens, model_name, ...) goes straight to the wrapped model
+        return getattr(self._model, attr)
+
+
+def get_rate_limiter_stats():
+    """Queue depth, wait times and admission counters for every limiter, keyed by name"""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,341 @@
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+import urllib3
+
+# HTTP statuses worth retrying: the upstream is overloaded or briefly unavailable
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Statuses that mean the request was turned away before any work was done, so
+# even calls that create or bill something can be sent again
+REJECTED_STATUS_CODES = {429, 503}
+
+# Every upstream created in this process, so stats can be reported in one place
+_upstreams = {}
+
+# Hedged second requests run here so the caller can wait on whichever finishes first
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='hedge')
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while its circuit breaker is open"""
+    pass
+
+
+def is_transient_response(response):
+    """True for HTTP responses that should be retried"""
+    return response.status_code in TRANSIENT_STATUS_CODES
+
+
+def is_rejected_response(response):
+    """
+    True for HTTP responses that are safe to retry on non-idempotent calls: a 500
+    or 504 may arrive after the resource was already created or billed
+    """
+    return response.status_code in REJECTED_STATUS_CODES
+
+
+def _failed_before_sending(error):
+    """True if the connection was never established, so the request never left"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        # requests wraps urllib3's MaxRetryError; a NewConnectionError reason means
+        # connecting (or resolving the host) failed, not a drop mid-request
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+    return isinstance(error, ConnectionRefusedError)
+
+
+def is_transient_error(error, idempotent=True):
+    """
+    True for exceptions that are likely to succeed on retry. Non-idempotent calls
+    are only retried when the request never reached the upstream or was rejected
+    with 429/503, since otherwise the first request may have landed.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if not idempotent:
+        if _failed_before_sending(error):
+            return True
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return status in REJECTED_STATUS_CODES
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    # google.api_core errors carry the HTTP status in .code
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and code in TRANSIENT_STATUS_CODES:
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status in TRANSIENT_STATUS_CODES:
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and fails fast until
+    recovery_timeout has passed; then lets a single probe call through.
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == 'open':
+                remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(
+                        f"{self.name} is temporarily unavailable, please try again in {int(remaining) + 1}s"
+                    )
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open':
+                if self._probe_in_flight:
+                    raise CircuitOpenError(f"{self.name} is recovering, please try again shortly")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """End a call that says nothing about the upstream's health (e.g. a bad request)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"⚠️ Circuit opened for {self.name} after {self.failures} failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self):
+        """p95 latency in seconds, or None until there are enough samples"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+class Upstream:
+    """
+    Resilient wrapper for one external provider: retries transient failures
+    with jittered backoff, optionally hedges slow idempotent calls with a
+    second request once p95 latency is exceeded, and fails fast through a
+    circuit breaker while the provider is down. Latency is measured from
+    the moment a call is admitted by the limiter, so queueing is not
+    mistaken for a slow upstream.
+    """
+
+    def __init__(self, name, retry_policy=None, hedge=False, hedge_min_delay=0.5,
+                 failure_threshold=5, recovery_timeout=30, limiter=None):
+        self.name = name
+        # Optional RateLimitedClient whose slots every attempt (and hedge) must hold
+        self.limiter = limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = CircuitBreaker(name, failure_threshold, recovery_timeout)
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0, 'short_circuited': 0}
+        _upstreams[name] = self
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _run(self, fn, slot=None):
+        """Call fn() and record its latency; frees the limiter slot taken for it, if any"""
+        started = time.monotonic()
+        result = None
+        try:
+            result = fn()
+            self.latency.record(time.monotonic() - started)
+            return result
+        finally:
+            if slot is not None:
+                self.limiter.release(slot, result)
+
+    def _hedged(self, fn, slot=None):
+        delay = self.latency.p95()
+        if delay is None:
+            return self._run(fn, slot)
+
+        first = _hedge_pool.submit(self._run, fn, slot)
+        done, _ = wait([first], timeout=max(delay, self.hedge_min_delay))
+        if done:
+            return first.result()
+
+        # A hedge needs budget of its own; never take it from callers already queued for one
+        hedge_slot = None
+        if self.limiter is not None:
+            if not self.limiter.try_acquire(slot):
+                return first.result()
+            hedge_slot = slot
+
+        # The first call is slower than usual; race a second one against it
+        self._count('hedges')
+        second = _hedge_pool.submit(self._run, fn, hedge_slot)
+        pending = {first, second}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count('hedge_wins')
+                    return future.result()
+                last_error = future.exception()
+        raise last_error
+
+    def call(self, fn, retry_result=None, hedge=None, idempotent=True, cost=0):
+        """
+        Call fn() under this upstream's policies.
+        retry_result(result) -> bool marks results (e.g. HTTP 503 responses)
+        that should be retried; if every attempt is transient the last result
+        is returned so the caller can report it. Non-idempotent calls are
+        never hedged, and exceptions are only retried if the request never
+        reached the upstream; pair them with is_rejected_response.
+        With a limiter, each attempt first waits for a slot of the given cost;
+        that wait is neither timed nor hedged.
+        """
+        use_hedge = (self.hedge if hedge is None else hedge) and idempotent
+        attempts = self.retry_policy.max_attempts
+        self._count('calls')
+
+        for attempt in range(1, attempts + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count('short_circuited')
+                raise
+
+            try:
+                slot = None
+                if self.limiter is not None:
+                    # Queue in the caller's thread, so waiting holds no hedge pool thread
+                    self.limiter.acquire(cost)
+                    slot = cost
+                result = self._hedged(fn, slot) if use_hedge else self._run(fn, slot)
+            except Exception as e:
+                if not is_transient_error(e, idempotent):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                if attempt == attempts:
+                    raise
+                print(f"⚠️ {self.name} attempt {attempt}/{attempts} failed: {str(e)}")
+            else:
+                if retry_result is None or not retry_result(result):
+                    self.breaker.record_success()
+                    return result
+                self.breaker.record_failure()
+                if attempt == attempts:
+                    return result
+                print(f"⚠️ {self.name} attempt {attempt}/{attempts} got a transient response")
+
+            self._count('retries')
+            time.sleep(self.retry_policy.backoff(attempt))
+
+    def stream(self, fn, idempotent=True):
+        """
+        Yield from the iterator fn() returns, under the circuit breaker.
+        Transient failures before the first item are retried like call();
+        once items have been yielded a failure is raised, since they cannot
+        be taken back. A stream closed early by the consumer leaves the
+        breaker as it was.
+        """
+        attempts = self.retry_policy.max_attempts
+        self._count('calls')
+
+        for attempt in range(1, attempts + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count('short_circuited')
+                raise
+
+            started = False
+            try:
+                for item in fn():
+                    started = True
+                    yield item
+            except Exception as e:
+                if not is_transient_error(e, idempotent):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                if started or attempt == attempts:
+                    raise
+                print(f"⚠️ {self.name} stream attempt {attempt}/{attempts} failed: {str(e)}")
+            except BaseException:
+                # GeneratorExit when the client disconnects: says nothing about the upstream
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return
+
+            self._count('retries')
+            time.sleep(self.retry_policy.backoff(attempt))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        p95 = self.latency.p95()
+        stats.update({
+            'circuit': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None
+        })
+        return stats
+
+
+def get_resilience_stats():
+    """Retry, hedge and circuit breaker state for every upstream, keyed by name"""
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
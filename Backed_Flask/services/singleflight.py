@@ -0,0 +1,73 @@
+import threading
+
+# Every group created in this process, so stats can be reported in one place
+_groups = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, later callers block until it finishes and get the same result
+    (or the same exception) instead of making their own call.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = {'executed': 0, 'coalesced': 0}
+        _groups[name] = self
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            waiters = {key[:16]: call.waiters for key, call in self._calls.items()}
+        counters.update({
+            'in_flight': len(waiters),
+            'waiting': sum(waiters.values()),
+            'waiters_by_key': waiters
+        })
+        return counters
+
+
+def get_singleflight_stats():
+    """In-flight and coalescing counters for every group in this process, keyed by name"""
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,52 @@
+import json
+from flask import Response, stream_with_context
+
+
+def format_sse(data, event=None):
+    """Encode one Server-Sent Event; data is sent as JSON"""
+    message = ''
+    if event:
+        message += f"event: {event}\n"
+    message += f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return message
+
+
+def wants_stream(request, data=None):
+    """
+    Streaming is opt-in: ?stream=1, {"stream": true} in the JSON body,
+    or an Accept header asking for text/event-stream
+    """
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if data and data.get('stream') is True:
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
+
+
+def stream_tokens(chunks, build_result):
+    """
+    Turn an iterator of text pieces into SSE events: one 'token' event per
+    piece, then a 'done' event carrying build_result(full_text) - the same
+    JSON the non-streaming endpoint returns. Failures become an 'error' event.
+    """
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield format_sse({'text': chunk}, event='token')
+        yield format_sse(build_result(''.join(parts)), event='done')
+    except Exception as e:
+        print(f"❌ Streaming error: {str(e)}")
+        yield format_sse({'error': str(e)}, event='error')
+
+
+def sse_response(events):
+    """Flask response that flushes each event to the client as it is produced"""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
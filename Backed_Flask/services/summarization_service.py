@@ -0,0 +1,149 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from services.gemini_service import genrate_sumary, summarize_chunk, combine_summaries
+from services.rate_limiter import estimate_tokens
+
+load_dotenv()
+
+# Rough token budget per prompt
+CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '6000'))
+MAX_WORKERS = int(os.getenv('SUMMARY_MAX_WORKERS', '4'))
+MAX_REDUCE_DEPTH = 6
+
+# Shared across requests so total concurrent chunk calls to Gemini stay bounded
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='summary')
+
+
+def _split_oversized(segment, max_tokens):
+    """Break a single segment that is over budget into paragraphs, then sentences, then hard cuts"""
+    for pattern in (r'\n\s*\n', r'(?<=[.!?])\s+'):
+        parts = [p for p in re.split(pattern, segment) if p.strip()]
+        if len(parts) > 1:
+            pieces = []
+            for part in parts:
+                if estimate_tokens(part) > max_tokens:
+                    pieces.extend(_split_oversized(part, max_tokens))
+                else:
+                    pieces.append(part)
+            return pieces
+
+    max_chars = max_tokens * 4
+    return [segment[i:i + max_chars] for i in range(0, len(segment), max_chars)]
+
+
+def split_into_chunks(segments, max_tokens=CHUNK_TOKENS):
+    """
+    Pack boundary-aligned segments (pages, paragraphs, transcript lines) into
+    chunks that each fit within max_tokens. Segments are only split when a
+    single one is over budget on its own.
+    """
+    if isinstance(segments, str):
+        segments = re.split(r'\n\s*\n', segments)
+
+    pieces = []
+    for segment in segments:
+        if not segment or not segment.strip():
+            continue
+        if estimate_tokens(segment) > max_tokens:
+            pieces.extend(_split_oversized(segment, max_tokens))
+        else:
+            pieces.append(segment)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += piece_tokens
+
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def _map_concurrently(func, items):
+    """Run func over items on the shared pool, keeping input order"""
+    futures = [_executor.submit(func, *item) for item in items]
+    return [future.result() for future in futures]
+
+
+def summarize_long_text(segments, max_tokens=CHUNK_TOKENS):
+    """
+    Hierarchical map-reduce summary of a long document.
+    Chunks are summarized concurrently, then partial summaries are combined
+    level by level until a single summary remains, so latency grows with the
+    depth of the tree instead of the length of the document.
+    Returns {'Summary': ...} like genrate_sumary, or {'error': ...}.
+    """
+    try:
+        chunks = split_into_chunks(segments, max_tokens)
+        if not chunks:
+            return {'error': 'No text provided'}
+
+        # Short documents don't need the tree at all
+        if len(chunks) == 1:
+            return genrate_sumary(chunks[0])
+
+        print(f"🧩 Map-reduce summary: {len(chunks)} chunks, {MAX_WORKERS} workers")
+
+        total = len(chunks)
+        results = _map_concurrently(
+            summarize_chunk,
+            [(chunk, index + 1, total) for index, chunk in enumerate(chunks)]
+        )
+        partials = []
+        for result in results:
+            if 'error' in result:
+                return result
+            partials.append(result['Summary'])
+
+        depth = 1
+        while len(partials) > 1:
+            if depth > MAX_REDUCE_DEPTH:
+                return {'error': 'Document too long to summarize'}
+
+            groups = _group_summaries(partials, max_tokens)
+            print(f"🧩 Reduce level {depth}: {len(partials)} summaries -> {len(groups)}")
+
+            results = _map_concurrently(combine_summaries, [(group,) for group in groups])
+            partials = []
+            for result in results:
+                if 'error' in result:
+                    return result
+                partials.append(result['Summary'])
+            depth += 1
+
+        return {'Summary': partials[0]}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _group_summaries(summaries, max_tokens):
+    """Group partial summaries so each combine prompt fits the budget (at least two per group)"""
+    groups = []
+    current = []
+    current_tokens = 0
+    for summary in summaries:
+        summary_tokens = estimate_tokens(summary)
+        if len(current) >= 2 and current_tokens + summary_tokens > max_tokens:
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(summary)
+        current_tokens += summary_tokens
+
+    if current:
+        # Never leave a lone summary in its own group, it would not shrink
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        else:
+            groups.append(current)
+    return groups
@@ -2,11 +2,15 @@ import os
 import requests
 import tempfile
 from dotenv import load_dotenv
+from services.resilience import Upstream, RetryPolicy, is_transient_response, is_rejected_response
 
 load_dotenv()
 TAVUS_API_KEY = os.getenv('TAVUS_API_KEY')
 TAVUS_BASE_URL = "https://tavusapi.com/v2"
 
+# Video creation is not idempotent, so only lookups are hedged
+tavus_api = Upstream('tavus', RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=8.0))
+
 def generate_avatar_video(script, character, emotion):
     """
     Generate avatar video using Tavus API with correct format
@@ -55,11 +59,15 @@ def generate_avatar_video(script, character, emotion):
         }
         
         print(f"🌐 Making request to Tavus API...")
-        response = requests.post(
-            f"{TAVUS_BASE_URL}/videos",
-            headers=headers,
-            json=payload,
-            timeout=30
+        response = tavus_api.call(
+            lambda: requests.post(
+                f"{TAVUS_BASE_URL}/videos",
+                headers=headers,
+                json=payload,
+                timeout=(5, 30)
+            ),
+            retry_result=is_rejected_response,
+            idempotent=False
         )
         
         print(f"📡 Tavus Response Status: {response.status_code}")
@@ -129,9 +137,14 @@ def get_video_status(video_id):
             "x-api-key": TAVUS_API_KEY
         }
         
-        response = requests.get(
-            f"{TAVUS_BASE_URL}/videos/{video_id}",
-            headers=headers
+        response = tavus_api.call(
+            lambda: requests.get(
+                f"{TAVUS_BASE_URL}/videos/{video_id}",
+                headers=headers,
+                timeout=(5, 10)
+            ),
+            retry_result=is_transient_response,
+            hedge=True
         )
         
         if response.status_code == 200:
@@ -154,9 +167,14 @@ def list_available_replicas():
             "x-api-key": TAVUS_API_KEY
         }
         
-        response = requests.get(
-            f"{TAVUS_BASE_URL}/replicas",
-            headers=headers
+        response = tavus_api.call(
+            lambda: requests.get(
+                f"{TAVUS_BASE_URL}/replicas",
+                headers=headers,
+                timeout=(5, 10)
+            ),
+            retry_result=is_transient_response,
+            hedge=True
         )
         
         if response.status_code == 200:
@@ -0,0 +1,90 @@
+import re
+from difflib import SequenceMatcher
+from services.rate_limiter import estimate_tokens
+
+# [Music], [Applause], (laughter), ♪ ... ♪ and ">>" speaker-change markers
+NON_SPEECH = re.compile(
+    r'\[[^\]]{0,40}\]|\((?:music|applause|laughter|laughs|inaudible|silence|cheering)[^)]{0,20}\)|[♪♫]+|>>',
+    re.IGNORECASE
+)
+# Only sounds that never carry meaning; "like" or "you know" can be real words
+FILLERS = re.compile(r'\b(?:u+h+|u+m+|u+h+m+|e+r+m+|h+m+|mm-?hmm)\b[,.]?\s*', re.IGNORECASE)
+WORD_CHARS = re.compile(r"[^\w']+")
+
+# Rolling auto-captions repeat the tail of one line at the start of the next
+MIN_OVERLAP_WORDS = 2
+MAX_OVERLAP_WORDS = 15
+NEAR_DUPLICATE_RATIO = 0.9
+
+
+def _normalize_word(word):
+    return WORD_CHARS.sub('', word.lower())
+
+
+def _overlap(previous_words, words):
+    """Number of leading words that repeat the end of the previous line"""
+    limit = min(len(previous_words), len(words), MAX_OVERLAP_WORDS)
+    for size in range(limit, MIN_OVERLAP_WORDS - 1, -1):
+        if previous_words[-size:] == words[:size]:
+            return size
+    return 0
+
+
+def _extend(segment, start, duration):
+    """Stretch a kept segment over the time of a dropped one that followed it"""
+    segment[1] = round(max(segment[0] + segment[1], start + duration) - segment[0], 2)
+
+
+def clean_segments(segments):
+    """
+    Clean auto-generated caption segments ([start, duration, text]) before
+    summarizing: strips non-speech tags and filler sounds, removes words a
+    rolling caption repeats from the previous line, and drops lines that
+    nearly duplicate the one before (their time is added to it).
+    Returns (segments, report) where report counts what was removed and
+    the estimated prompt tokens saved.
+    """
+    report = {'tags_removed': 0, 'fillers_removed': 0, 'overlap_words_removed': 0, 'duplicate_lines_removed': 0}
+    cleaned = []
+    previous_words = []
+
+    for start, duration, text in segments:
+        text, tags = NON_SPEECH.subn(' ', text)
+        text, fillers = FILLERS.subn(' ', text)
+        report['tags_removed'] += tags
+        report['fillers_removed'] += fillers
+
+        words = text.split()
+        normalized = [_normalize_word(word) for word in words]
+
+        overlap = _overlap(previous_words, normalized)
+        if overlap:
+            words = words[overlap:]
+            normalized = normalized[overlap:]
+            report['overlap_words_removed'] += overlap
+
+        if not words:
+            # Nothing but non-speech, or a line the previous one already said in full
+            if overlap and cleaned:
+                report['duplicate_lines_removed'] += 1
+                _extend(cleaned[-1], start, duration)
+            continue
+
+        line = ' '.join(normalized)
+        if cleaned and SequenceMatcher(None, ' '.join(previous_words[-len(normalized):]), line).ratio() >= NEAR_DUPLICATE_RATIO:
+            report['duplicate_lines_removed'] += 1
+            _extend(cleaned[-1], start, duration)
+            continue
+
+        cleaned.append([start, duration, ' '.join(words)])
+        previous_words = (previous_words + normalized)[-MAX_OVERLAP_WORDS:]
+
+    tokens_before = estimate_tokens(' '.join(segment[2] for segment in segments))
+    tokens_after = estimate_tokens(' '.join(segment[2] for segment in cleaned))
+    report.update({
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'tokens_saved': tokens_before - tokens_after,
+        'percent_saved': round(100 * (tokens_before - tokens_after) / tokens_before, 1) if tokens_before else 0
+    })
+    return cleaned, report
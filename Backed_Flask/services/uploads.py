@@ -0,0 +1,99 @@
+import os
+import hashlib
+import tempfile
+from io import BytesIO
+from flask import Request
+from dotenv import load_dotenv
+
+load_dotenv()
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Uploads up to this size stay in memory; bigger ones roll over to a temp file
+SPOOL_MAX_MEMORY = int(os.getenv('UPLOAD_SPOOL_MAX_MEMORY_KB', '1024')) * 1024
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_MB', '50')) * 1024 * 1024
+PDF_MAX_UPLOAD_BYTES = int(os.getenv('PDF_MAX_UPLOAD_MB', '50')) * 1024 * 1024
+IMAGE_MAX_UPLOAD_BYTES = int(os.getenv('IMAGE_MAX_UPLOAD_MB', '20')) * 1024 * 1024
+
+
+class SpooledUpload:
+    """
+    Where one uploaded file is written while the request body is parsed.
+    Chunks are hashed as they arrive and kept in memory until SPOOL_MAX_MEMORY,
+    then the file rolls over to a named temp file. PyPDF2 and PIL read it as
+    an ordinary file object, and .path gives worker processes a file to open.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._file = BytesIO()
+        self._path = None
+
+    def write(self, data):
+        if self._path is None and self.size + len(data) > SPOOL_MAX_MEMORY:
+            self._rollover()
+        self._file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def _rollover(self):
+        position = self._file.tell()
+        fd, path = tempfile.mkstemp(prefix='mentora_upload_')
+        disk_file = os.fdopen(fd, 'w+b')
+        disk_file.write(self._file.getbuffer())
+        disk_file.seek(position)
+        self._file.close()
+        self._file = disk_file
+        self._path = path
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    @property
+    def path(self):
+        """Path of the upload on disk, spilling a small in-memory upload first"""
+        if self._path is None:
+            self._rollover()
+        self._file.flush()
+        return self._path
+
+    def close(self):
+        self._file.close()
+        if self._path and os.path.exists(self._path):
+            os.unlink(self._path)
+            self._path = None
+
+    def __getattr__(self, name):
+        # read, seek, tell, readline, ... come straight from the underlying file
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """
+    Request class that parses file fields straight into SpooledUpload objects.
+    Flask closes them (and deletes any temp file) when the request ends.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledUpload()
+
+
+def receive_upload(file_storage):
+    """
+    The SpooledUpload behind an uploaded file, rewound for reading. Files
+    parsed some other way are copied into one in fixed-size chunks.
+    """
+    stream = file_storage.stream
+    if not isinstance(stream, SpooledUpload):
+        upload = SpooledUpload()
+        stream.seek(0)
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            upload.write(chunk)
+        # Swapped in so closing the request still cleans up the spool
+        file_storage.stream = stream = upload
+    stream.seek(0)
+    return stream
@@ -1,12 +1,69 @@
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httplib2
 from googleapiclient.discovery import build
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
 from dotenv import load_dotenv
+from services.cache_service import TieredCache, make_cache_key
+from services.transcript_cleanup import clean_segments
 
 load_dotenv()
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
 
+# Titles and captions rarely change; "no captions" answers are rechecked sooner in case they get added
+VIDEO_INFO_TTL = int(os.getenv('YOUTUBE_INFO_TTL_HOURS', '24')) * 3600
+TRANSCRIPT_TTL = int(os.getenv('YOUTUBE_TRANSCRIPT_TTL_HOURS', '168')) * 3600
+NEGATIVE_TTL = int(os.getenv('YOUTUBE_NEGATIVE_TTL_HOURS', '6')) * 3600
+
+VIDEO_NOT_FOUND = "Video not found or unavailable"
+TRANSCRIPT_TOO_SHORT = "Transcript too short - video may not contain meaningful spoken content"
+SUBTITLES_DISABLED = "Subtitles are disabled for this video"
+NO_TRANSCRIPT = "No transcript available for this video"
+VIDEO_PRIVATE = "Video is unavailable or private"
+API_KEY_MISSING = "YouTube API key not configured"
+# Answers about the video itself, as opposed to network or quota failures, are safe to cache
+PERMANENT_TRANSCRIPT_ERRORS = {TRANSCRIPT_TOO_SHORT, SUBTITLES_DISABLED, NO_TRANSCRIPT, VIDEO_PRIVATE}
+
+youtube_cache = TieredCache('youtube', max_memory_entries=256, max_disk_entries=10000, default_ttl=VIDEO_INFO_TTL)
+
+_youtube_client = None
+_client_lock = threading.Lock()
+_http_local = threading.local()
+
+# Metadata and transcript lookups run here so one video's lookups overlap
+_lookup_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('YOUTUBE_MAX_WORKERS', '8')),
+    thread_name_prefix='youtube'
+)
+
+def _get_youtube_client():
+    """The Data API client, built once from the discovery document bundled with the library"""
+    global _youtube_client
+    with _client_lock:
+        if _youtube_client is None:
+            _youtube_client = build(
+                'youtube', 'v3',
+                developerKey=YOUTUBE_API_KEY,
+                static_discovery=True,
+                cache_discovery=False
+            )
+        return _youtube_client
+
+# "1:23 Topic" / "(01:02:03) - Topic" lines in a description
+CHAPTER_LINE = re.compile(r'^\s*[\[(]?((?:\d{1,2}:)?\d{1,2}:\d{2})[\])]?\s*[-\u2013\u2014:|]?\s*(.+?)\s*$')
+
+VIDEOS_PER_REQUEST = 50  # the Data API's maximum for videos().list and playlistItems().list
+PLAYLIST_TTL = int(os.getenv('YOUTUBE_PLAYLIST_TTL_HOURS', '1')) * 3600
+
+def _thread_http():
+    """httplib2.Http is not thread-safe, so each thread keeps its own, along with its keep-alive connection"""
+    http = getattr(_http_local, 'http', None)
+    if http is None:
+        http = _http_local.http = httplib2.Http(timeout=10)
+    return http
+
 def extract_video_id(url):
     """Extract video ID from YouTube URL"""
     patterns = [
@@ -19,68 +76,279 @@ def extract_video_id(url):
         if match:
             return match.group(1)
     return None
+
+def extract_playlist_id(url):
+    """Playlist ID from a playlist URL, or from a watch URL that is part of a playlist"""
+    match = re.search(r'[?&]list=([A-Za-z0-9_-]+)', url)
+    return match.group(1) if match else None
+
+def extract_channel_ref(url):
+    """(channels().list filter, value) for a channel URL, or None"""
+    patterns = [
+        (r'youtube\.com\/channel\/(UC[A-Za-z0-9_-]+)', 'id'),
+        (r'youtube\.com\/(@[A-Za-z0-9_.-]+)', 'forHandle'),
+        (r'youtube\.com\/user\/([A-Za-z0-9_-]+)', 'forUsername')
+    ]
+    
+    for pattern, field in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return field, match.group(1)
+    return None
+
+def _cache_key(kind, video_id):
+    return make_cache_key('youtube', kind, video_id)
+
+def parse_description_chapters(description):
+    """
+    Chapters listed in a video description as "0:00 Intro" lines, as
+    [{'start': seconds, 'title'}]. Follows YouTube's own rules: the first
+    starts at 0:00, there are at least three, and they are in ascending order.
+    """
+    chapters = []
+    for line in (description or '').splitlines():
+        match = CHAPTER_LINE.match(line)
+        if not match:
+            continue
+        seconds = 0
+        for part in match.group(1).split(':'):
+            seconds = seconds * 60 + int(part)
+        if chapters and seconds <= chapters[-1]['start']:
+            continue
+        chapters.append({'start': seconds, 'title': match.group(2)})
+    
+    if len(chapters) < 3 or chapters[0]['start'] != 0:
+        return []
+    return chapters
+
+def _details(title=None, duration=None, error=None, is_music=False, chapters=None):
+    return {'title': title, 'duration': duration, 'error': error, 'is_music': is_music, 'chapters': chapters or []}
+
+def _details_from_item(video):
+    snippet = video['snippet']
+    return _details(
+        title=snippet['title'],
+        duration=video['contentDetails']['duration'],
+        is_music=snippet.get('categoryId', '') == '10',
+        chapters=parse_description_chapters(snippet.get('description', ''))
+    )
+
+def _info_tuple(details):
+    return details['title'], details['duration'], details['error'], details['is_music']
+
+def _cache_details(video_id, details):
+    if details['error'] is None or details['error'] == VIDEO_NOT_FOUND:
+        youtube_cache.set(
+            _cache_key('details', video_id),
+            details,
+            ttl=VIDEO_INFO_TTL if details['error'] is None else NEGATIVE_TTL
+        )
+
+def get_video_details(video_id):
+    """Metadata for a video as {'title', 'duration', 'error', 'is_music', 'chapters'}, from the cache when possible"""
+    cached = youtube_cache.get(_cache_key('details', video_id))
+    if cached is not None:
+        print(f"⚡ YouTube info cache hit for {video_id}")
+        return cached
+    
+    details = _fetch_video_details(video_id)
+    _cache_details(video_id, details)
+    return details
+
 def get_video_info(video_id):
+    """(title, duration, error, is_music) for a video, from the cache when possible"""
+    return _info_tuple(get_video_details(video_id))
+
+def _fetch_video_details(video_id):
     try:
         if not YOUTUBE_API_KEY:
-            return None, None, "YouTube API key not configured", False
+            return _details(error=API_KEY_MISSING)
             
-        youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
-        request = youtube.videos().list(
+        request = _get_youtube_client().videos().list(
             part='snippet,contentDetails',
             id=video_id
         )
-        response = request.execute()
+        response = request.execute(http=_thread_http())
         
         if response['items']:
-            video = response['items'][0]
-            title = video['snippet']['title']
-            duration = video['contentDetails']['duration']
-            category_id = video['snippet'].get('categoryId', '')
-            is_music = category_id == '10'
-            return title, duration, None, is_music
+            return _details_from_item(response['items'][0])
         
-        return None, None, "Video not found or unavailable", False
+        return _details(error=VIDEO_NOT_FOUND)
     
     except Exception as e:
         print(f"Error getting video info: {e}")
-        return None, None, f"Failed to get video information: {str(e)}", False
+        return _details(error=f"Failed to get video information: {str(e)}")
+
+def get_videos_info(video_ids):
+    """
+    get_video_info for many videos at once: cached entries are reused and the
+    rest are looked up with one videos().list call per 50 IDs (one quota unit each).
+    Returns {video_id: (title, duration, error, is_music)}.
+    """
+    results = {}
+    missing = []
+    for video_id in video_ids:
+        cached = youtube_cache.get(_cache_key('details', video_id))
+        if cached is not None:
+            results[video_id] = _info_tuple(cached)
+        else:
+            missing.append(video_id)
+    
+    if missing and not YOUTUBE_API_KEY:
+        results.update({video_id: _info_tuple(_details(error=API_KEY_MISSING)) for video_id in missing})
+        return results
+    
+    for start in range(0, len(missing), VIDEOS_PER_REQUEST):
+        batch = missing[start:start + VIDEOS_PER_REQUEST]
+        try:
+            response = _get_youtube_client().videos().list(
+                part='snippet,contentDetails',
+                id=','.join(batch),
+                maxResults=VIDEOS_PER_REQUEST
+            ).execute(http=_thread_http())
+        except Exception as e:
+            print(f"Error getting video info: {e}")
+            failed = _details(error=f"Failed to get video information: {str(e)}")
+            results.update({video_id: _info_tuple(failed) for video_id in batch})
+            continue
+        
+        found = {item['id']: _details_from_item(item) for item in response.get('items', [])}
+        for video_id in batch:
+            details = found.get(video_id) or _details(error=VIDEO_NOT_FOUND)
+            _cache_details(video_id, details)
+            results[video_id] = _info_tuple(details)
+    return results
+
+def get_video_segments(video_id):
+    """
+    (segments, error) for a video, from the cache when possible. Segments are
+    compact [start_seconds, duration_seconds, text] lists in caption order.
+    """
+    key = _cache_key('segments', video_id)
+    cached = youtube_cache.get(key)
+    if cached is not None:
+        print(f"⚡ YouTube transcript cache hit for {video_id}")
+        return cached['segments'], cached['error']
+    
+    segments, error = _fetch_video_segments(video_id)
+    if error is None or error in PERMANENT_TRANSCRIPT_ERRORS:
+        youtube_cache.set(
+            key,
+            {'segments': segments, 'error': error},
+            ttl=TRANSCRIPT_TTL if error is None else NEGATIVE_TTL
+        )
+    return segments, error
+
+def join_segments(segments):
+    return ' '.join(segment[2] for segment in segments)
 
 def get_video_transcript(video_id):
-    """Get video transcript using youtube-transcript-api with enhanced error handling"""
+    """(transcript, error) for a video, with the caption segments joined into one text"""
+    segments, error = get_video_segments(video_id)
+    if error:
+        return None, error
+    return join_segments(segments), None
+
+def _fetch_video_segments(video_id):
+    """Get video transcript segments using youtube-transcript-api with enhanced error handling"""
     try:
         # Try to get transcript
         transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
         
-        # Combine all transcript text
-        full_transcript = ' '.join([item['text'] for item in transcript_list])
+        # Keep timing with each caption so summaries can link back into the video
+        segments = [
+            [round(item['start'], 2), round(item.get('duration', 0), 2), item['text']]
+            for item in transcript_list
+        ]
         
         # Check if transcript is too short (likely auto-generated noise)
-        if len(full_transcript.strip()) < 50:
-            return None, "Transcript too short - video may not contain meaningful spoken content"
+        if len(join_segments(segments).strip()) < 50:
+            return None, TRANSCRIPT_TOO_SHORT
         
-        return full_transcript, None
+        return segments, None
         
     except TranscriptsDisabled:
-        return None, "Subtitles are disabled for this video"
+        return None, SUBTITLES_DISABLED
     except NoTranscriptFound:
-        return None, "No transcript available for this video"
+        return None, NO_TRANSCRIPT
     except VideoUnavailable:
-        return None, "Video is unavailable or private"
+        return None, VIDEO_PRIVATE
     except Exception as e:
         error_msg = str(e).lower()
         
         # Handle specific error cases
         if "subtitles are disabled" in error_msg:
-            return None, "Subtitles are disabled for this video"
+            return None, SUBTITLES_DISABLED
         elif "no transcript" in error_msg:
-            return None, "No transcript available for this video"
+            return None, NO_TRANSCRIPT
         elif "video unavailable" in error_msg:
-            return None, "Video is unavailable or private"
+            return None, VIDEO_PRIVATE
         elif "could not retrieve" in error_msg:
             return None, "Unable to retrieve transcript - video may not have captions"
         else:
             return None, f"Transcript extraction failed: {str(e)}"
 
+def resolve_playlist(url, max_videos):
+    """
+    Video IDs of a playlist or of a channel's uploads, in playlist order.
+    Returns ({'playlist_id', 'title', 'video_ids'}, None) or (None, error).
+    Listings are cached briefly since courses gain videos over time.
+    """
+    if not YOUTUBE_API_KEY:
+        return None, API_KEY_MISSING
+    
+    playlist_id = extract_playlist_id(url)
+    channel_ref = None if playlist_id else extract_channel_ref(url)
+    if not playlist_id and not channel_ref:
+        return None, "Invalid playlist or channel URL"
+    
+    key = _cache_key('playlist', [playlist_id or channel_ref, max_videos])
+    cached = youtube_cache.get(key)
+    if cached is not None:
+        print(f"⚡ YouTube playlist cache hit for {cached['playlist_id']}")
+        return cached, None
+    
+    try:
+        youtube = _get_youtube_client()
+        if channel_ref:
+            # A channel's uploads are an ordinary playlist
+            field, value = channel_ref
+            response = youtube.channels().list(
+                part='snippet,contentDetails', **{field: value}
+            ).execute(http=_thread_http())
+            if not response.get('items'):
+                return None, "Channel not found"
+            channel = response['items'][0]
+            playlist_id = channel['contentDetails']['relatedPlaylists']['uploads']
+            title = channel['snippet']['title']
+        else:
+            response = youtube.playlists().list(part='snippet', id=playlist_id).execute(http=_thread_http())
+            if not response.get('items'):
+                return None, "Playlist not found or private"
+            title = response['items'][0]['snippet']['title']
+        
+        video_ids = []
+        page_token = None
+        while len(video_ids) < max_videos:
+            response = youtube.playlistItems().list(
+                part='contentDetails',
+                playlistId=playlist_id,
+                maxResults=VIDEOS_PER_REQUEST,
+                pageToken=page_token
+            ).execute(http=_thread_http())
+            video_ids.extend(item['contentDetails']['videoId'] for item in response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+    
+    except Exception as e:
+        print(f"Error listing playlist: {e}")
+        return None, f"Failed to list playlist videos: {str(e)}"
+    
+    playlist = {'playlist_id': playlist_id, 'title': title, 'video_ids': video_ids[:max_videos]}
+    youtube_cache.set(key, playlist, ttl=PLAYLIST_TTL)
+    return playlist, None
+
 def is_educational_content(title, transcript_sample=""):
     """
     Determine if content is likely educational based on title and transcript sample
@@ -163,15 +431,26 @@ def process_youtube_video(url):
             ]
         }
     
+    # Metadata and transcript are independent, so fetch them in parallel
+    details_future = _lookup_pool.submit(get_video_details, video_id)
+    segments_future = _lookup_pool.submit(get_video_segments, video_id)
+    
     # Get video information
-    title, duration, api_error, is_music = get_video_info(video_id)
+    details = details_future.result()
+    title, duration, api_error, is_music = _info_tuple(details)
     
     if api_error:
         print(f"API Error: {api_error}")
         # Continue without API data, but note the limitation
     
     # Get transcript
-    transcript, transcript_error = get_video_transcript(video_id)
+    segments, transcript_error = segments_future.result()
+    cleanup = None
+    transcript = None
+    if segments:
+        # Auto-captions are full of [Music] tags, filler and repeated fragments that only cost tokens
+        segments, cleanup = clean_segments(segments)
+        transcript = join_segments(segments)
     
     if transcript_error:
         # Provide specific error handling based on content type
@@ -211,5 +490,8 @@ def process_youtube_video(url):
         'title': title or 'Unknown Title',
         'duration': duration,
         'transcript': transcript,
+        'segments': segments,
+        'chapters': details['chapters'],
+        'cleanup': cleanup,
         'transcript_length': len(transcript) if transcript else 0
     }, None
\ No newline at end of file
@@ -24,8 +24,8 @@ const PDFSummarizer: React.FC = () => {
       setError('Please select a valid PDF file');
       return;
     }
-    if (file.size > 10 * 1024 * 1024) {
-      setError('PDF file is too large. Maximum allowed size is 10MB.');
+    if (file.size > 50 * 1024 * 1024) {
+      setError('PDF file is too large. Maximum allowed size is 50MB.');
       setSelectedFile(null);
       setSummary('');
       return;
@@ -177,7 +177,7 @@ const PDFSummarizer: React.FC = () => {
                 {selectedFile ? selectedFile.name : 'Click to select PDF file'}
               </span>
               <span className="text-sm text-neutral-500 mt-1 block">
-                Maximum file size: 10MB
+                Maximum file size: 50MB
               </span>
             </div>
           </label>
@@ -270,7 +270,7 @@ const PDFSummarizer: React.FC = () => {
           <ul className="text-xs text-red-600 space-y-1">
             <li>• Works best with text-based PDFs (not scanned images)</li>
             <li>• Academic papers, reports, and articles work great</li>
-            <li>• Maximum file size: 10MB for optimal processing</li>
+            <li>• Maximum file size: 50MB for optimal processing</li>
             {!user && <li>• <strong>Sign in to track your PDF analysis progress</strong></li>}
           </ul>
         </div>